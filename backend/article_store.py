@@ -0,0 +1,231 @@
+"""
+SQLite-backed article store behind the news feed.
+
+Articles are classified once, when they are ingested, and stored with their
+category, so serving the feed never runs a model. Feed pages use keyset
+(cursor) pagination over the (published_at, id) and
+(category_key, published_at, id) indexes: every page is one index range
+scan, no matter how deep the client has paged or how many articles exist.
+"""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+SUMMARY_CHARS = 200
+
+def encode_cursor(published_at: float, article_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([published_at, article_id]).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """(published_at, id) of the last item of the previous page; ValueError if malformed"""
+    try:
+        published_at, article_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(published_at), int(article_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def page_etag(page: dict) -> str:
+    """Strong ETag of a feed page (changes whenever any item on it changes)"""
+    body = json.dumps(page, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def _timestamp(value) -> float:
+    if value is None:
+        return datetime.now(timezone.utc).timestamp()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _summary(content: str) -> str:
+    content = " ".join(content.split())
+    if len(content) <= SUMMARY_CHARS:
+        return content
+    return content[:SUMMARY_CHARS].rsplit(" ", 1)[0] + "..."
+
+INSERT_ARTICLE = (
+    "INSERT INTO articles (title, content, summary, category, category_key, category_source, "
+    "confidence, model_version, published_at, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+def _rows(articles: list, predictions: list) -> list:
+    """INSERT_ARTICLE parameters for articles and their predictions (None: editor-assigned category)"""
+    now = datetime.now(timezone.utc).timestamp()
+    rows = []
+    for article, prediction in zip(articles, predictions):
+        if prediction is None:
+            category, source, confidence, version = article["category"], "editor", None, None
+        else:
+            category, source = prediction["category"], "model"
+            confidence, version = prediction["confidence"], prediction.get("model_version")
+        rows.append((
+            article["title"], article["content"], article.get("summary") or _summary(article["content"]),
+            category, category.lower(), source, confidence, version,
+            _timestamp(article.get("published_at")), now
+        ))
+    return rows
+
+class ArticleStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._connect()
+        # SQLite connections must not be shared across fork(); workers
+        # forked from a preloading master open their own
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        # WAL lets other workers read the feed while one is ingesting
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT NOT NULL, "
+            "summary TEXT NOT NULL, category TEXT NOT NULL, category_key TEXT NOT NULL, "
+            "category_source TEXT NOT NULL, confidence REAL, model_version TEXT, "
+            "published_at REAL NOT NULL, ingested_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_articles_time ON articles (published_at DESC, id DESC);"
+            "CREATE INDEX IF NOT EXISTS idx_articles_category "
+            "ON articles (category_key, published_at DESC, id DESC);"
+            "CREATE TABLE IF NOT EXISTS reading_history ("
+            "user_id TEXT NOT NULL, article_id INTEGER NOT NULL, read_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_history_user ON reading_history (user_id, read_at);"
+        )
+        self._db.commit()
+
+    def add_articles(self, articles: list, predictions: list) -> list:
+        """
+        Store `articles` (dicts with title, content and optional summary,
+        category and published_at) with their predictions (dicts with
+        category, confidence and model_version, or None where the article
+        already had an editor-assigned category). Returns the new ids.
+        """
+        rows = _rows(articles, predictions)
+        with self._lock:
+            ids = [self._db.execute(INSERT_ARTICLE, row).lastrowid for row in rows]
+            self._db.commit()
+        return ids
+
+    def seed(self, articles: list) -> int:
+        """
+        Add `articles` (with editor-assigned categories, the first one
+        newest) only if the store is empty. Returns how many were added.
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        articles = [
+            {**article, "published_at": datetime.fromtimestamp(now - i, timezone.utc)}
+            for i, article in enumerate(articles)
+        ]
+        rows = _rows(articles, [None] * len(articles))
+        with self._lock:
+            # One transaction, so workers starting together seed only once
+            self._db.execute("BEGIN IMMEDIATE")
+            if self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]:
+                self._db.rollback()
+                return 0
+            self._db.executemany(INSERT_ARTICLE, rows)
+            self._db.commit()
+        return len(rows)
+
+    def page(self, category: str = None, limit: int = 20, cursor: str = None) -> dict:
+        """
+        One feed page, newest first: {"items": [...], "next_cursor": ...}.
+        Pass the returned next_cursor to get the following page.
+        """
+        conditions, params = [], []
+        if category:
+            conditions.append("category_key = ?")
+            params.append(category.lower())
+        if cursor:
+            conditions.append("(published_at, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, title, summary, category, category_source, confidence, published_at FROM articles "
+                f"{where}ORDER BY published_at DESC, id DESC LIMIT ?",
+                (*params, limit + 1)
+            ).fetchall()
+        items = [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "category": row["category"],
+                "summary": row["summary"],
+                "confidence": row["confidence"],
+                "category_source": row["category_source"],
+                "published_at": datetime.fromtimestamp(row["published_at"], timezone.utc).isoformat(timespec="seconds"),
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last["published_at"], last["id"])
+        return {"items": items, "next_cursor": next_cursor}
+
+    def iter_articles(self, batch_size: int = 5000):
+        """Yield lists of (id, category, title, content) for every article, in id order"""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, category, title, content FROM articles WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+            last_id = rows[-1]["id"]
+
+    def get_articles(self, ids) -> dict:
+        """Feed items by id (missing ids are left out)"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, title, summary, category FROM articles WHERE id IN ({','.join('?' * len(ids))})",
+                ids
+            ).fetchall()
+        return {row["id"]: dict(row) for row in rows}
+
+    def add_reads(self, user_id: str, article_ids) -> list:
+        """Record that `user_id` read `article_ids`; returns the ids that exist"""
+        existing = self.get_articles(article_ids)
+        known = [article_id for article_id in article_ids if article_id in existing]
+        now = datetime.now(timezone.utc).timestamp()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO reading_history (user_id, article_id, read_at) VALUES (?, ?, ?)",
+                [(user_id, article_id, now) for article_id in known]
+            )
+            self._db.commit()
+        return known
+
+    def history(self, user_id: str, limit: int = 200) -> list:
+        """The user's most recently read article ids, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT article_id FROM reading_history WHERE user_id = ? ORDER BY read_at DESC, rowid DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+
+
+class BatchStats:
+    """
+    Running counters describing how full the dispatched batches are
+    """
+    def __init__(self, max_batch_size: int):
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.size_histogram = {}
+        self._lock = threading.Lock()
+
+    def record(self, batch_size: int):
+        with self._lock:
+            self.batches += 1
+            self.items += batch_size
+            self.largest_batch = max(self.largest_batch, batch_size)
+            self.size_histogram[batch_size] = self.size_histogram.get(batch_size, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg_size = self.items / self.batches if self.batches else 0.0
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "max_batch_size": self.max_batch_size,
+                "largest_batch": self.largest_batch,
+                "avg_batch_size": round(avg_size, 3),
+                "avg_fill_ratio": round(avg_size / self.max_batch_size, 3),
+                "size_histogram": dict(sorted(self.size_histogram.items())),
+            }
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into batches of up to `max_batch_size`
+    items, waiting at most `max_wait_ms` after the first item arrives.
+
+    `process_batch` receives a list of items and must return a list of
+    results in the same order. Each caller awaiting `submit` gets back the
+    result for its own item (or the exception raised by the batch).
+    When `pool` (an InferencePool) is given, batches run on it instead of
+    blocking the event loop.
+    """
+    def __init__(self, process_batch, max_batch_size: int = 8, max_wait_ms: float = 10.0, pool=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0) / 1000.0
+        self.pool = pool
+        self.stats = BatchStats(max_batch_size)
+        self._queue = None
+        self._worker = None
+
+    def _ensure_started(self):
+        # The queue and worker are bound to the running event loop, so they
+        # are created on first use rather than at import time
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        """Queue a single item and wait for its result"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Drop callers that went away while waiting in the queue
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if batch:
+                await self._dispatch(batch)
+
+    async def _dispatch(self, batch: list):
+        self.stats.record(len(batch))
+        items = [item for item, _ in batch]
+        try:
+            if self.pool is not None:
+                results = await self.pool.run(self.process_batch, items)
+            else:
+                results = self.process_batch(items)
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        """Stop the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
@@ -0,0 +1,359 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: peak memory isn't reported there
+    resource = None
+import sys
+import time
+import types
+from datetime import datetime
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "flipitnews-data.csv")
+KEYWORDS_PATH = os.path.join(BASE_DIR, "rule_keywords.json")
+
+# Words per text for each length class of --lengths
+LENGTH_WORDS = {"short": 30, "medium": 150, "long": 600}
+FILLER = ("the a of to in and on for with said after new year week report people first over "
+          "also would could from this that were their about more than into").split()
+
+ENDPOINTS = {
+    "bert": ("POST", "/predict/bert"),
+    "custom": ("POST", "/predict/custom"),
+    "auto": ("POST", "/predict/auto"),
+    "batch": ("POST", "/predict/batch"),
+    "health": ("GET", "/health"),
+}
+# Model each endpoint needs to be ready (main.py /ready)
+ENDPOINT_MODELS = {"bert": "zero-shot", "custom": "custom", "auto": "custom"}
+BATCH_MODELS = {"bert": "zero-shot", "custom": "custom"}
+
+def parse_weights(spec: str, allowed) -> dict:
+    """'bert=1,custom=3' -> {'bert': 1.0, 'custom': 3.0}"""
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in allowed:
+            raise ValueError(f"Unknown entry '{name}' (choose from {', '.join(allowed)})")
+        weights[name] = float(weight or 1)
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+def install_stub_zero_shot(latency_ms: float):
+    """
+    Replace transformers.pipeline with a stand-in zero-shot classifier that
+    sleeps `latency_ms` per (text, label) pair, so the API runs offline
+    without downloading BART.
+    """
+    class StubZeroShot:
+        model = types.SimpleNamespace(config=types.SimpleNamespace(_commit_hash="stub0000"))
+
+        def __call__(self, sequences, candidate_labels, **kwargs):
+            single = isinstance(sequences, str)
+            sequences = [sequences] if single else sequences
+            time.sleep(latency_ms / 1000 * len(sequences) * len(candidate_labels))
+            outputs = []
+            for text in sequences:
+                scores = [1.0 + text.lower().count(label.lower()) for label in candidate_labels]
+                ranked = sorted(zip(scores, candidate_labels), reverse=True)
+                total = sum(scores)
+                outputs.append({
+                    "sequence": text,
+                    "labels": [label for _, label in ranked],
+                    "scores": [score / total for score, _ in ranked]
+                })
+            return outputs[0] if single else outputs
+
+    stub = types.ModuleType("transformers")
+    stub.pipeline = lambda *args, **kwargs: StubZeroShot()
+    sys.modules["transformers"] = stub
+
+class TextSampler:
+    """Draws request texts with the requested length mix"""
+    def __init__(self, lengths: dict, pool_size: int, seed: int = 42):
+        self.random = random.Random(seed)
+        self.lengths = lengths
+        self.words = self._vocabulary()
+        self.pool = [self._generate() for _ in range(pool_size)]
+        self.counter = 0
+
+    def _vocabulary(self) -> list:
+        if os.path.exists(DATA_PATH):
+            import pandas as pd
+            articles = pd.read_csv(DATA_PATH, usecols=["Article"])["Article"].head(500)
+            return " ".join(articles).split()
+        # No dataset: mix category keywords into filler words
+        with open(KEYWORDS_PATH, encoding="utf-8") as f:
+            keywords = [k for category in json.load(f).values() for k in category]
+        return keywords + FILLER * 4
+
+    def _generate(self) -> str:
+        length = self.random.choices(list(self.lengths), weights=list(self.lengths.values()))[0]
+        return " ".join(self.random.choices(self.words, k=LENGTH_WORDS[length]))
+
+    def next(self) -> str:
+        if self.pool:
+            return self.random.choice(self.pool)
+        # No pool: every text is unique, so the prediction cache never hits
+        self.counter += 1
+        return f"{self._generate()} {self.counter}"
+
+def build_request(kind: str, sampler: TextSampler, batch_size: int, batch_model: str):
+    method, path = ENDPOINTS[kind]
+    if kind == "health":
+        return method, path, None
+    if kind == "batch":
+        return method, path, {"texts": [sampler.next() for _ in range(batch_size)], "model": batch_model}
+    return method, path, {"text": sampler.next()}
+
+def rss_mb(pid: str = "self") -> float:
+    """Current resident memory of a process (Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def latency_summary(latencies: list, duration: float) -> dict:
+    if not latencies:
+        return {"requests": 0, "rps": 0.0}
+    values = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / duration, 2),
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+async def wait_until_ready(client, kinds: list, batch_model: str, timeout: float) -> list:
+    """Wait for the models the mix needs; drop endpoints whose model never loads"""
+    required = {**ENDPOINT_MODELS, "batch": BATCH_MODELS.get(batch_model)}
+    deadline = time.perf_counter() + timeout
+    models = {}
+    while True:
+        response = await client.get("/ready")
+        if response.status_code == 404:
+            return kinds  # main_render.py: nothing to load
+        models = response.json().get("models", {})
+        needed = [required[k] for k in kinds if required.get(k)]
+        if all(models.get(m, {}).get("status") in ("ready", "failed", "missing") for m in needed):
+            break
+        if time.perf_counter() > deadline:
+            break
+        await asyncio.sleep(0.2)
+
+    usable = []
+    for kind in kinds:
+        model = required.get(kind)
+        status = models.get(model, {}).get("status") if model else "ready"
+        if status == "ready":
+            usable.append(kind)
+        else:
+            print(f"⚠️ Skipping '{kind}': model '{model}' is {status}")
+    return usable
+
+async def run_load(client, args, mix: dict, sampler: TextSampler) -> dict:
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    results = {kind: {"latencies": [], "statuses": {}, "errors": 0} for kind in kinds}
+    chooser = random.Random(args.seed)
+
+    async def worker(deadline: float):
+        while time.perf_counter() < deadline:
+            kind = chooser.choices(kinds, weights=weights)[0]
+            method, path, body = build_request(kind, sampler, args.batch_size, args.batch_model)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            result = results[kind]
+            result["statuses"][status] = result["statuses"].get(status, 0) + 1
+            if status.startswith("2"):
+                result["latencies"].append(elapsed)
+            else:
+                result["errors"] += 1
+
+    if args.warmup > 0:
+        print(f"🔥 Warming up for {args.warmup}s...")
+        await asyncio.gather(*[worker(time.perf_counter() + args.warmup) for _ in range(args.concurrency)])
+        results = {kind: {"latencies": [], "statuses": {}, "errors": 0} for kind in kinds}
+
+    print(f"🚀 Running {args.concurrency} concurrent clients for {args.duration}s...")
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(start + args.duration) for _ in range(args.concurrency)])
+    duration = time.perf_counter() - start
+
+    endpoints = {}
+    for kind, result in results.items():
+        endpoints[kind] = {
+            **latency_summary(result["latencies"], duration),
+            "errors": result["errors"],
+            "statuses": result["statuses"],
+        }
+    all_latencies = [l for result in results.values() for l in result["latencies"]]
+    overall = {**latency_summary(all_latencies, duration), "errors": sum(r["errors"] for r in results.values())}
+    return {"duration_s": round(duration, 2), "overall": overall, "endpoints": endpoints}
+
+async def benchmark(args) -> dict:
+    import httpx
+
+    lengths = parse_weights(args.lengths, LENGTH_WORDS)
+    mix = parse_weights(args.mix, ENDPOINTS)
+    sampler = TextSampler(lengths, args.text_pool, args.seed)
+    memory = {"before_mb": None, "after_mb": None}
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        async with client:
+            mix = {k: w for k, w in mix.items() if k in await wait_until_ready(client, list(mix), args.batch_model, args.ready_timeout)}
+            if args.server_pid:
+                memory["before_mb"] = rss_mb(args.server_pid)
+            report = await run_load(client, args, mix, sampler) if mix else None
+            if args.server_pid:
+                memory["after_mb"] = rss_mb(args.server_pid)
+    else:
+        if args.stub_zero_shot:
+            install_stub_zero_shot(args.stub_latency_ms)
+        sys.path.insert(0, BASE_DIR)
+        module = __import__(args.app)
+        app = module.app
+        transport = httpx.ASGITransport(app=app)
+        # ASGITransport doesn't send lifespan events, so run the app's lifespan here
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout) as client:
+                mix = {k: w for k, w in mix.items() if k in await wait_until_ready(client, list(mix), args.batch_model, args.ready_timeout)}
+                memory["before_mb"] = rss_mb()
+                report = await run_load(client, args, mix, sampler) if mix else None
+                memory["after_mb"] = rss_mb()
+        if resource is not None:
+            memory["peak_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    if report is None:
+        raise SystemExit("❌ No endpoint in the mix is available")
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "target": args.url or f"{args.app}.py (in-process)",
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "mix": mix,
+            "lengths": lengths,
+            "text_pool": args.text_pool,
+            "batch_size": args.batch_size,
+            "stub_zero_shot": bool(args.stub_zero_shot and not args.url),
+        },
+        **report,
+        "memory": memory,
+    }
+
+def print_report(results: dict):
+    print("\n" + "=" * 96)
+    print(f"BENCHMARK RESULTS - {results['target']}")
+    print("=" * 96)
+    print(f"{'Endpoint':10s} {'Requests':>9s} {'RPS':>9s} {'p50 ms':>9s} {'p95 ms':>9s} "
+          f"{'p99 ms':>9s} {'Max ms':>9s} {'Errors':>7s}  Statuses")
+    print("-" * 96)
+    rows = list(results["endpoints"].items()) + [("overall", results["overall"])]
+    for name, row in rows:
+        if not row["requests"]:
+            print(f"{name:10s} {0:9d} {'-':>9s} {'-':>9s} {'-':>9s} {'-':>9s} {'-':>9s} {row['errors']:7d}  {row.get('statuses', '')}")
+            continue
+        print(f"{name:10s} {row['requests']:9d} {row['rps']:9.1f} {row['p50_ms']:9.1f} {row['p95_ms']:9.1f} "
+              f"{row['p99_ms']:9.1f} {row['max_ms']:9.1f} {row['errors']:7d}  {row.get('statuses', '')}")
+    print("=" * 96)
+    memory = results["memory"]
+    if memory.get("before_mb") is not None:
+        line = f"💾 RSS: {memory['before_mb']:.1f} MB -> {memory['after_mb']:.1f} MB"
+        if memory.get("peak_mb"):
+            line += f" (peak {memory['peak_mb']:.1f} MB)"
+        print(line)
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Print throughput and tail latency against a baseline run.
+    Returns False when any endpoint regressed by more than `tolerance`.
+    """
+    print("\n📊 Compared to baseline from", baseline.get("timestamp", "?"))
+    ok = True
+    names = [name for name in results["endpoints"] if name in baseline.get("endpoints", {})] + ["overall"]
+    for name in names:
+        current = results["overall"] if name == "overall" else results["endpoints"][name]
+        previous = baseline["overall"] if name == "overall" else baseline["endpoints"][name]
+        if not current.get("requests") or not previous.get("requests"):
+            continue
+        checks = [
+            ("rps", current["rps"] / previous["rps"] - 1, -1),
+            ("p95_ms", current["p95_ms"] / previous["p95_ms"] - 1, 1),
+            ("p99_ms", current["p99_ms"] / previous["p99_ms"] - 1, 1),
+        ]
+        parts = []
+        for metric, change, worse_sign in checks:
+            regressed = change * worse_sign > tolerance
+            ok = ok and not regressed
+            parts.append(f"{'❌' if regressed else '✅'} {metric} {change * 100:+.1f}%")
+        print(f"   {name:10s} " + " | ".join(parts))
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load test for the FlipItNews API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--app", default="main", choices=["main", "main_render"],
+                        help="Run this app in-process over ASGI (default)")
+    target.add_argument("--url", help="Benchmark a running server instead, e.g. http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before the run")
+    parser.add_argument("--mix", default="custom=3,bert=1,batch=1",
+                        help="Weighted request mix over bert, custom, auto, batch, health")
+    parser.add_argument("--lengths", default="short=2,medium=2,long=1",
+                        help=f"Weighted text length mix ({', '.join(f'{k}={v} words' for k, v in LENGTH_WORDS.items())})")
+    parser.add_argument("--text-pool", type=int, default=200,
+                        help="Distinct texts to draw from (0 = every text unique, no cache hits)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--batch-model", default="custom", choices=["bert", "custom", "rule-based"])
+    parser.add_argument("--stub-zero-shot", action="store_true",
+                        help="In-process only: replace BART with a stub so the benchmark runs offline")
+    parser.add_argument("--stub-latency-ms", type=float, default=5.0,
+                        help="Stub cost per (text, label) pair")
+    parser.add_argument("--server-pid", help="With --url: pid of the server to report memory for")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative regression in RPS, p95 and p99 before failing")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare_to_baseline(results, baseline, args.tolerance):
+            print(f"❌ Regression beyond {args.tolerance:.0%} against baseline")
+            sys.exit(1)
+        print("✅ No regression against baseline")
@@ -0,0 +1,97 @@
+import pandas as pd
+import argparse
+import joblib
+import os
+import time
+from sklearn.model_selection import train_test_split
+from label_pruning import keyword_distribution, prune_labels
+from text_preprocessing import preprocess_texts
+from zero_shot_engine import load_zero_shot_classifier
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "flipitnews-data.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "custom_model.joblib")
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+CANDIDATE_LABELS = ["Technology", "Business", "Sports", "Entertainment", "Politics"]
+
+def label_sets_for(mode, texts, top_k, min_mass):
+    if mode == "off":
+        return [tuple(CANDIDATE_LABELS)] * len(texts)
+    if mode == "custom":
+        custom_model = joblib.load(MODEL_PATH)
+        probabilities = custom_model.predict_proba(preprocess_texts(texts))
+        distributions = [dict(zip(custom_model.classes_, row)) for row in probabilities]
+    else:
+        distributions = [keyword_distribution(text) for text in texts]
+    return [prune_labels(d, CANDIDATE_LABELS, top_k, min_mass) for d in distributions]
+
+def run_benchmark(modes, sample_size, top_k, min_mass, engine, count_only):
+    print("🚀 Benchmarking candidate-label pruning...")
+
+    if not os.path.exists(DATA_PATH):
+        print(f"❌ Error: Data file not found at {DATA_PATH}")
+        return
+    if "custom" in modes and not os.path.exists(MODEL_PATH):
+        print(f"❌ Error: Custom model not found at {MODEL_PATH}. Run train_custom_model.py first.")
+        return
+
+    df = pd.read_csv(DATA_PATH)
+    if sample_size < len(df):
+        df, _ = train_test_split(df, train_size=sample_size, random_state=42, stratify=df['Category'])
+    texts = df['Article'].tolist()
+    y_true = df['Category'].tolist()
+    print(f"📊 {len(texts)} articles, top_k={top_k}, min_mass={min_mass}")
+
+    classifier = None if count_only else load_zero_shot_classifier(ZERO_SHOT_MODEL, engine)
+
+    rows = []
+    baseline_predictions = None
+    for mode in modes:
+        label_sets = label_sets_for(mode, texts, top_k, min_mass)
+        pairs = sum(len(labels) for labels in label_sets)
+        row = {
+            "mode": mode,
+            "pairs": pairs,
+            "pair_reduction": 1 - pairs / (len(texts) * len(CANDIDATE_LABELS)),
+            "fallback_rate": sum(len(l) == len(CANDIDATE_LABELS) for l in label_sets) / len(texts),
+        }
+
+        if classifier is not None:
+            print(f"🧠 Scoring with mode '{mode}'...")
+            predictions = []
+            start = time.perf_counter()
+            for text, labels in zip(texts, label_sets):
+                predictions.append(classifier(text, list(labels))['labels'][0])
+            row["ms_per_article"] = (time.perf_counter() - start) / len(texts) * 1000
+            row["accuracy"] = sum(p == y for p, y in zip(predictions, y_true)) / len(texts)
+            if baseline_predictions is None and mode == "off":
+                baseline_predictions = predictions
+            if baseline_predictions is not None:
+                row["agreement"] = sum(p == b for p, b in zip(predictions, baseline_predictions)) / len(texts)
+        rows.append(row)
+
+    print("\n" + "=" * 80)
+    print("SUMMARY")
+    print("=" * 80)
+    for row in rows:
+        line = (f"{row['mode']:12s}: {row['pairs']:6d} NLI pairs | "
+                f"{row['pair_reduction']*100:5.1f}% fewer | {row['fallback_rate']*100:5.1f}% used all labels")
+        if "accuracy" in row:
+            line += f" | {row['accuracy']*100:.2f}% acc | {row['ms_per_article']:.1f} ms/article"
+        if "agreement" in row:
+            line += f" | {row['agreement']*100:.1f}% agree with full set"
+        print(line)
+    print("=" * 80)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure NLI forward passes saved by candidate-label pruning")
+    parser.add_argument("--modes", nargs="+", default=["off", "custom", "rule-based"],
+                        choices=["off", "custom", "rule-based"])
+    parser.add_argument("--sample-size", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--min-mass", type=float, default=0.6)
+    parser.add_argument("--engine", default=os.getenv("ZERO_SHOT_ENGINE", "pytorch"))
+    parser.add_argument("--count-only", action="store_true", help="Only count NLI pairs, skip the zero-shot model")
+    args = parser.parse_args()
+    run_benchmark(args.modes, args.sample_size, args.top_k, args.min_mass, args.engine, args.count_only)
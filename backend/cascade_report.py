@@ -0,0 +1,134 @@
+import pandas as pd
+import numpy as np
+import argparse
+import joblib
+import os
+from sklearn.model_selection import train_test_split
+from text_preprocessing import preprocess_texts
+from zero_shot_engine import load_zero_shot_classifier
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "flipitnews-data.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "custom_model.joblib")
+BERT_PREDICTIONS_PATH = os.path.join(BASE_DIR, "cascade_bert_predictions.csv")
+PLOT_PATH = os.path.join(BASE_DIR, "cascade_curve.png")
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+CANDIDATE_LABELS = ["Technology", "Business", "Sports", "Entertainment", "Politics"]
+
+def bert_predictions(df, engine, batch_size):
+    """
+    Zero-shot predictions for every row, reusing earlier runs from
+    BERT_PREDICTIONS_PATH so that only new articles hit the model
+    """
+    cached = {}
+    if os.path.exists(BERT_PREDICTIONS_PATH):
+        previous = pd.read_csv(BERT_PREDICTIONS_PATH)
+        cached = dict(zip(previous['Article'], previous['bert_prediction']))
+
+    missing = [text for text in df['Article'].unique() if text not in cached]
+    if missing:
+        print(f"🧠 Scoring {len(missing)} articles with the zero-shot model ({engine})...")
+        classifier = load_zero_shot_classifier(ZERO_SHOT_MODEL, engine)
+        for i in range(0, len(missing), batch_size):
+            chunk = missing[i:i + batch_size]
+            outputs = classifier(chunk, CANDIDATE_LABELS)
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            cached.update((text, output['labels'][0]) for text, output in zip(chunk, outputs))
+            print(f"   {min(i + batch_size, len(missing))}/{len(missing)}")
+        pd.DataFrame({"Article": list(cached), "bert_prediction": list(cached.values())}).to_csv(
+            BERT_PREDICTIONS_PATH, index=False
+        )
+
+    return df['Article'].map(cached).to_numpy()
+
+def cascade_curve(margins, custom_correct, bert_correct, thresholds):
+    """Escalation rate and accuracy of the cascade at each margin threshold"""
+    rows = []
+    for threshold in thresholds:
+        escalated = margins < threshold
+        correct = np.where(escalated, bert_correct, custom_correct)
+        rows.append({
+            "threshold": round(float(threshold), 3),
+            "escalation_rate": escalated.mean(),
+            "accuracy": correct.mean(),
+        })
+    return pd.DataFrame(rows)
+
+def run_report(data_path, engine, batch_size, tolerance, full_data, stratified_split):
+    print("🚀 Replaying labelled data through the model cascade...")
+
+    if not os.path.exists(data_path):
+        print(f"❌ Error: Data file not found at {data_path}")
+        return
+    if not os.path.exists(MODEL_PATH):
+        print(f"❌ Error: Custom model not found at {MODEL_PATH}. Run train_custom_model.py first.")
+        return
+
+    print(f"📊 Loading data from {data_path}...")
+    df = pd.read_csv(data_path)
+    if not full_data:
+        # Same held-out split as the trainer, so the custom model is evaluated
+        # on articles it hasn't seen: train_custom_model.py splits at random,
+        # train_all_models.py stratifies by category (--stratified-split)
+        _, df = train_test_split(df, test_size=0.2, random_state=42,
+                                 stratify=df['Category'] if stratified_split else None)
+    y_true = df['Category'].to_numpy()
+
+    custom_model = joblib.load(MODEL_PATH)
+    probabilities = custom_model.predict_proba(preprocess_texts(df['Article']))
+    top_two = np.sort(probabilities, axis=1)[:, -2:]
+    margins = top_two[:, 1] - top_two[:, 0]
+    custom_correct = custom_model.classes_[probabilities.argmax(axis=1)] == y_true
+    bert_correct = bert_predictions(df, engine, batch_size) == y_true
+
+    curve = cascade_curve(margins, custom_correct, bert_correct, np.linspace(0, 1, 101))
+    best_accuracy = curve['accuracy'].max()
+    acceptable = curve[curve['accuracy'] >= best_accuracy - tolerance]
+    recommended = acceptable.sort_values(['escalation_rate', 'threshold']).iloc[0]
+
+    print(f"\nSamples: {len(df)}")
+    print(f"Custom model only: {custom_correct.mean()*100:.2f}%")
+    print(f"Zero-shot only:    {bert_correct.mean()*100:.2f}%")
+    print("\n" + "=" * 50)
+    print(f"{'threshold':>10s} {'escalation':>12s} {'accuracy':>10s}")
+    print("=" * 50)
+    for _, row in curve.iloc[::5].iterrows():
+        print(f"{row['threshold']:10.2f} {row['escalation_rate']*100:11.1f}% {row['accuracy']*100:9.2f}%")
+    print("=" * 50)
+    print(f"\n🏆 Recommended CASCADE_MARGIN_THRESHOLD={recommended['threshold']:.2f} "
+          f"({recommended['escalation_rate']*100:.1f}% escalated, {recommended['accuracy']*100:.2f}% accuracy, "
+          f"within {tolerance*100:.1f} pts of the best cascade accuracy)")
+
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("ℹ️ matplotlib not installed, skipping plot")
+        return
+
+    fig, ax = plt.subplots(figsize=(7, 5))
+    ax.plot(curve['escalation_rate'] * 100, curve['accuracy'] * 100, marker='.')
+    ax.scatter([recommended['escalation_rate'] * 100], [recommended['accuracy'] * 100], color='red', zorder=3,
+               label=f"threshold {recommended['threshold']:.2f}")
+    ax.set_xlabel("Escalated to zero-shot model (%)")
+    ax.set_ylabel("Cascade accuracy (%)")
+    ax.set_title("Model cascade: escalation rate vs accuracy")
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.savefig(PLOT_PATH, dpi=120, bbox_inches="tight")
+    print(f"📈 Plot saved to: {PLOT_PATH}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escalation-rate vs accuracy curve for /predict/auto")
+    parser.add_argument("--data", default=DATA_PATH, help="Labelled CSV with Article and Category columns")
+    parser.add_argument("--engine", default=os.getenv("ZERO_SHOT_ENGINE", "pytorch"))
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Accepted accuracy loss vs the best threshold")
+    parser.add_argument("--full-data", action="store_true", help="Replay every row instead of the held-out split")
+    parser.add_argument("--stratified-split", action="store_true",
+                        help="Hold out train_all_models.py's stratified split (model trained by that script)")
+    args = parser.parse_args()
+    run_report(args.data, args.engine, args.batch_size, args.tolerance, args.full_data, args.stratified_split)
@@ -0,0 +1,276 @@
+"""
+Offline bulk classification of archived articles.
+
+    python classify_bulk.py articles.csv predictions.csv --model custom --workers 4
+    python classify_bulk.py articles.jsonl predictions.parquet --model rule-based
+
+The input (CSV or JSONL with an `Article` column) is streamed in chunks;
+chunks are classified on a process pool and written in input order as
+they finish. After every written chunk a checkpoint records how far the
+run got, so re-running the same command after a crash resumes there.
+
+CSV output is appended to a single file. Parquet output is a directory of
+part files (read it back with pd.read_parquet(directory)).
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import pandas as pd
+
+from model_registry import resolve_artifact
+from text_preprocessing import preprocess_texts
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+CANDIDATE_LABELS = ["Technology", "Business", "Sports", "Entertainment", "Politics"]
+
+# --- Worker side: each process loads the model once, then scores chunks ---
+_scorer = None
+
+def init_worker(model: str, model_path: str, engine: str):
+    global _scorer
+    if model == "custom":
+        # Memory-mapped arrays are shared between the worker processes
+        custom_model = joblib.load(model_path, mmap_mode="r")
+
+        def score(texts):
+            probabilities = custom_model.predict_proba(preprocess_texts(texts))
+            best = probabilities.argmax(axis=1)
+            return [
+                (str(custom_model.classes_[b]), float(row[b]))
+                for b, row in zip(best, probabilities)
+            ]
+    elif model == "bert":
+        from zero_shot_engine import load_zero_shot_classifier
+        classifier = load_zero_shot_classifier(ZERO_SHOT_MODEL, engine)
+
+        def score(texts):
+            outputs = classifier(texts, CANDIDATE_LABELS, batch_size=8)
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            return [(output['labels'][0], float(output['scores'][0])) for output in outputs]
+    else:
+        from rule_based import classify_texts_simple
+
+        def score(texts):
+            return [(r["category"], r["confidence"]) for r in classify_texts_simple(texts)]
+    _scorer = score
+
+def classify_chunk(texts: list) -> list:
+    # Empty/missing articles get no prediction instead of failing the chunk
+    valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    results = [(None, None)] * len(texts)
+    for i, result in zip(valid, _scorer([texts[i] for i in valid])):
+        results[i] = result
+    return results
+
+# --- Reading ---
+def read_chunks(path: str, fmt: str, chunk_size: int, skip_rows: int):
+    """Yield DataFrames of up to `chunk_size` rows, starting after `skip_rows` data rows"""
+    if fmt == "csv":
+        reader = pd.read_csv(path, chunksize=chunk_size, skiprows=range(1, skip_rows + 1))
+        yield from reader
+        return
+
+    records = []
+    with open(path, encoding="utf-8") as f:
+        row = 0
+        for line in f:
+            if not line.strip():
+                continue
+            row += 1
+            if row <= skip_rows:
+                continue
+            records.append(json.loads(line))
+            if len(records) == chunk_size:
+                yield pd.DataFrame.from_records(records)
+                records = []
+    if records:
+        yield pd.DataFrame.from_records(records)
+
+# --- Writing and checkpoints ---
+class ResultWriter:
+    """Appends result chunks to a CSV file or to a directory of Parquet parts"""
+    def __init__(self, path: str, fmt: str):
+        self.path = path
+        self.fmt = fmt
+
+    def prepare(self, checkpoint: dict):
+        """Drop anything written after the last checkpoint (a chunk cut off by a crash)"""
+        if self.fmt == "parquet":
+            os.makedirs(self.path, exist_ok=True)
+            for name in os.listdir(self.path):
+                if name.startswith("part-") and int(name[5:10]) >= checkpoint["chunks_done"]:
+                    os.remove(os.path.join(self.path, name))
+        elif os.path.exists(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(checkpoint["output_bytes"])
+
+    def write(self, df: pd.DataFrame, chunk_index: int) -> int:
+        """Write one chunk durably; returns the CSV size (0 for Parquet)"""
+        if self.fmt == "parquet":
+            part = os.path.join(self.path, f"part-{chunk_index:05d}.parquet")
+            df.to_parquet(part + ".tmp", index=False)
+            os.replace(part + ".tmp", part)
+            return 0
+        header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            df.to_csv(f, header=header, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+def load_checkpoint(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoint(path: str, checkpoint: dict):
+    checkpoint["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+INPUT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl"}
+
+def input_stamp(path: str) -> str:
+    """Size and mtime of the input, so a checkpoint isn't resumed against a changed file"""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def parquet_available() -> bool:
+    for engine in ("pyarrow", "fastparquet"):
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            pass
+    return False
+
+# --- Main loop ---
+def classify_file(args):
+    input_format = args.input_format or INPUT_FORMATS.get(os.path.splitext(args.input)[1].lower())
+    if input_format is None:
+        print(f"❌ Error: Can't tell the format of {args.input}; pass --input-format")
+        return
+    output_format = args.output_format or ("parquet" if args.output.endswith(".parquet") else "csv")
+    checkpoint_path = args.checkpoint or args.output.rstrip("/") + ".checkpoint.json"
+    if output_format == "parquet" and not parquet_available():
+        print("❌ Error: Parquet output needs pyarrow (pip install pyarrow)")
+        return
+
+    model_path, model_version = None, None
+    if args.model == "custom":
+        model_version, model_path = resolve_artifact(args.model_version)
+        if model_version is None or not os.path.exists(model_path):
+            print("❌ Error: Custom model not found. Run train_custom_model.py first.")
+            return
+    elif args.model == "bert":
+        model_version = f"{ZERO_SHOT_MODEL}:{args.engine}"
+    else:
+        from rule_based import RULES_VERSION
+        model_version = RULES_VERSION
+
+    job = {
+        "input": os.path.abspath(args.input),
+        "input_stamp": input_stamp(args.input),
+        "model": args.model,
+        "model_version": model_version,
+        "chunk_size": args.chunk_size,
+    }
+    checkpoint = None if args.restart else load_checkpoint(checkpoint_path)
+    if checkpoint is not None:
+        changed = [key for key, value in job.items() if checkpoint.get(key) != value]
+        if changed:
+            print(f"❌ Error: {checkpoint_path} belongs to a different run (changed: {', '.join(changed)}). "
+                  f"Use --restart to start over.")
+            return
+        print(f"♻️ Resuming after {checkpoint['rows_done']} rows ({checkpoint['chunks_done']} chunks)")
+    else:
+        checkpoint = {**job, "rows_done": 0, "chunks_done": 0, "output_bytes": 0}
+
+    writer = ResultWriter(args.output, output_format)
+    writer.prepare(checkpoint)
+
+    workers = args.workers or (1 if args.model == "bert" else os.cpu_count() or 1)
+    print(f"🚀 Classifying {args.input} with the {args.model} model ({model_version}) on {workers} worker(s)...")
+
+    chunks = read_chunks(args.input, input_format, args.chunk_size, checkpoint["rows_done"])
+    start = time.perf_counter()
+    rows_this_run = 0
+
+    def write_result(chunk, results):
+        nonlocal rows_this_run
+        first_row = checkpoint["rows_done"]
+        out = pd.DataFrame({"row": range(first_row, first_row + len(chunk))})
+        for column in args.keep_columns:
+            out[column] = chunk[column].values
+        out["category"] = [category for category, _ in results]
+        out["confidence"] = [confidence for _, confidence in results]
+        out["model_version"] = model_version
+
+        size = writer.write(out, checkpoint["chunks_done"])
+        checkpoint["rows_done"] += len(chunk)
+        checkpoint["chunks_done"] += 1
+        checkpoint["output_bytes"] = size
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        rows_this_run += len(chunk)
+        rate = rows_this_run / (time.perf_counter() - start)
+        print(f"   ✅ {checkpoint['rows_done']} rows done ({rate:.0f} rows/s)")
+
+    def texts_of(chunk):
+        if args.text_column not in chunk.columns:
+            raise KeyError(f"Column '{args.text_column}' not found in {args.input}")
+        return chunk[args.text_column].tolist()
+
+    if workers == 1:
+        init_worker(args.model, model_path, args.engine)
+        for chunk in chunks:
+            write_result(chunk, classify_chunk(texts_of(chunk)))
+    else:
+        with ProcessPoolExecutor(workers, initializer=init_worker,
+                                 initargs=(args.model, model_path, args.engine)) as pool:
+            # Keep a bounded number of chunks in flight and write them in
+            # input order, so the checkpoint is always a clean prefix
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(classify_chunk, texts_of(chunk))))
+                if len(pending) >= workers * 2:
+                    chunk, future = pending.popleft()
+                    write_result(chunk, future.result())
+            while pending:
+                chunk, future = pending.popleft()
+                write_result(chunk, future.result())
+
+    elapsed = time.perf_counter() - start
+    print("=" * 60)
+    print(f"✨ Done: {checkpoint['rows_done']} rows in {args.output} "
+          f"({rows_this_run} this run, {elapsed:.1f}s)")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify a large CSV/JSONL file of articles offline")
+    parser.add_argument("input", help="CSV or JSONL file with an Article column")
+    parser.add_argument("output", help="Result .csv file or .parquet directory")
+    parser.add_argument("--model", default="custom", choices=["custom", "rule-based", "bert"])
+    parser.add_argument("--model-version", help="Custom model registry version (default: CURRENT)")
+    parser.add_argument("--engine", default=os.getenv("ZERO_SHOT_ENGINE", "pytorch"),
+                        help="Zero-shot engine for --model bert")
+    parser.add_argument("--workers", type=int, help="Processes (default: CPU count, 1 for bert)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--text-column", default="Article")
+    parser.add_argument("--keep-columns", nargs="*", default=[],
+                        help="Input columns copied to the output (e.g. Category)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"])
+    parser.add_argument("--output-format", choices=["csv", "parquet"])
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    classify_file(parser.parse_args())
@@ -0,0 +1,143 @@
+import pandas as pd
+import argparse
+import os
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: peak memory isn't reported there
+    resource = None
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import train_test_split
+from zero_shot_engine import ENGINES, load_zero_shot_classifier
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "flipitnews-data.csv")
+RESULTS_FILE = os.path.join(BASE_DIR, "zero_shot_engine_results.txt")
+MODEL_NAME = "facebook/bart-large-mnli"
+CANDIDATE_LABELS = ["Technology", "Business", "Sports", "Entertainment", "Politics"]
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def format_mb(value):
+    return f"{value:.0f} MB" if value is not None else "n/a"
+
+def evaluate_engine(engine, texts, batch_size):
+    """
+    Load one engine and classify `texts`. Runs in its own process so the
+    memory figures of different engines don't mix.
+    """
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    classifier = load_zero_shot_classifier(MODEL_NAME, engine)
+    load_time = time.perf_counter() - start
+
+    predictions = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        outputs = classifier(texts[i:i + batch_size], CANDIDATE_LABELS)
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        predictions.extend(output['labels'][0] for output in outputs)
+    inference_time = time.perf_counter() - start
+
+    return {
+        "predictions": predictions,
+        "load_time": load_time,
+        "ms_per_article": inference_time / len(texts) * 1000,
+        "memory_mb": peak_rss_mb() - rss_before if rss_before is not None else None,
+    }
+
+def evaluate_engines(engines, sample_size, batch_size):
+    results = []
+    results.append("=" * 80)
+    results.append(f"ZERO-SHOT ENGINE PARITY REPORT")
+    results.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    results.append("=" * 80)
+    results.append("")
+
+    # 1. Load Data
+    if not os.path.exists(DATA_PATH):
+        print(f"❌ Error: Data file not found at {DATA_PATH}")
+        return
+
+    print(f"📊 Loading data from {DATA_PATH}...")
+    df = pd.read_csv(DATA_PATH)
+
+    # 2. Stratified sample (BART-large is too slow to score all 2225 articles)
+    if sample_size < len(df):
+        df, _ = train_test_split(df, train_size=sample_size, random_state=42, stratify=df['Category'])
+    texts = df['Article'].tolist()
+    y_true = df['Category'].tolist()
+    results.append(f"📊 Dataset: {DATA_PATH}")
+    results.append(f"Evaluated samples: {len(texts)}")
+    results.append(f"Model: {MODEL_NAME}")
+    results.append("")
+
+    # 3. Evaluate each engine in a fresh process
+    summary = {}
+    for engine in engines:
+        print(f"\n🧠 Evaluating engine '{engine}'...")
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                outcome = executor.submit(evaluate_engine, engine, texts, batch_size).result()
+        except Exception as e:
+            print(f"❌ {engine} failed: {e}")
+            results.append(f"\n{'=' * 80}")
+            results.append(f"ENGINE: {engine}")
+            results.append(f"{'=' * 80}")
+            results.append(f"\n❌ Failed: {e}")
+            continue
+
+        y_pred = outcome["predictions"]
+        accuracy = accuracy_score(y_true, y_pred)
+        summary[engine] = {**outcome, "accuracy": accuracy}
+
+        results.append(f"\n{'=' * 80}")
+        results.append(f"ENGINE: {engine}")
+        results.append(f"{'=' * 80}")
+        results.append(f"\n🏆 Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
+        results.append(f"⏱️ Load time: {outcome['load_time']:.2f}s")
+        results.append(f"⏱️ Latency: {outcome['ms_per_article']:.1f} ms/article")
+        results.append(f"💾 Peak memory increase: {format_mb(outcome['memory_mb'])}")
+        results.append(f"\n📊 Classification Report:")
+        results.append(classification_report(y_true, y_pred, zero_division=0))
+        results.append(f"\n🔢 Confusion Matrix:")
+        results.append(str(confusion_matrix(y_true, y_pred, labels=CANDIDATE_LABELS)))
+
+        print(f"✅ {engine} - Accuracy: {accuracy:.4f}, {outcome['ms_per_article']:.1f} ms/article")
+
+    # 4. Parity against the full-precision baseline
+    baseline = summary.get("pytorch")
+    results.append(f"\n{'=' * 80}")
+    results.append("SUMMARY")
+    results.append(f"{'=' * 80}")
+    for engine, stats in summary.items():
+        line = (f"{engine:12s}: {stats['accuracy']*100:.2f}% | "
+                f"{stats['ms_per_article']:.1f} ms/article | {format_mb(stats['memory_mb'])}")
+        if baseline and engine != "pytorch":
+            line += (f" | Δaccuracy {(stats['accuracy'] - baseline['accuracy'])*100:+.2f} pts"
+                     f" | speedup {baseline['ms_per_article'] / stats['ms_per_article']:.2f}x")
+        results.append(line)
+
+    # 5. Save Results to File
+    with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(results))
+
+    print("\n" + '\n'.join(results[-(len(summary) + 3):]))
+    print(f"\n📄 Results saved to: {RESULTS_FILE}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare accuracy, latency and memory of zero-shot engines")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--sample-size", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+    evaluate_engines(args.engines, args.sample_size, args.batch_size)
@@ -0,0 +1,47 @@
+from zero_shot_engine import onnx_model_dir
+import argparse
+import sys
+
+DEFAULT_MODEL = "facebook/bart-large-mnli"
+
+def export_model(model_name: str, quantize: bool):
+    print(f"⏳ Exporting '{model_name}' to ONNX...")
+    print("This loads the full model once and can take a few minutes, please wait...")
+
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+    except ImportError:
+        print("❌ optimum[onnxruntime] is required: pip install optimum[onnxruntime]")
+        sys.exit(1)
+
+    try:
+        output_dir = onnx_model_dir(model_name)
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model.save_pretrained(output_dir)
+        tokenizer.save_pretrained(output_dir)
+        print(f"✅ ONNX model saved to {output_dir}")
+
+        if quantize:
+            # Dynamic int8 quantization of the exported graph (weights only,
+            # activations are quantized on the fly at inference time)
+            print("⏳ Quantizing ONNX model to int8...")
+            int8_dir = onnx_model_dir(model_name, quantized=True)
+            quantizer = ORTQuantizer.from_pretrained(model)
+            qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+            tokenizer.save_pretrained(int8_dir)
+            print(f"✅ int8 ONNX model saved to {int8_dir}")
+
+    except Exception as e:
+        print(f"❌ Error exporting model: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the zero-shot model to ONNX Runtime")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Hugging Face model id")
+    parser.add_argument("--quantize", action="store_true", help="Also write an int8 dynamic-quantized export")
+    args = parser.parse_args()
+    export_model(args.model, args.quantize)
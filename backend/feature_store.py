@@ -0,0 +1,153 @@
+"""
+On-disk cache of preprocessed text and TF-IDF features for the training scripts.
+
+    feature_store/
+        cleaned-<key>.parquet        <- cleaned_text + Category of a data file
+        features-<key>/
+            vectorizer.joblib        <- fitted TfidfVectorizer
+            X_train.npz, X_test.npz  <- sparse TF-IDF matrices
+            labels.npz               <- y_train, y_test
+            meta.json
+
+Keys hash the raw data file together with the preprocessing code and the
+vectorizer/split configuration, so changing any of them misses the cache
+and rebuilds instead of reusing stale features.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import text_preprocessing
+from model_registry import data_hash
+from text_preprocessing import preprocess_texts
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", os.path.join(BASE_DIR, "feature_store"))
+# Changes whenever text_preprocessing.py changes
+PREPROCESSING_HASH = hashlib.sha256(inspect.getsource(text_preprocessing).encode()).hexdigest()[:16]
+
+FeatureSet = namedtuple("FeatureSet", "vectorizer X_train X_test y_train y_test key cache_hit")
+
+def _key(config: dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def _parquet_available() -> bool:
+    for engine in ("pyarrow", "fastparquet"):
+        try:
+            __import__(engine)
+            return True
+        except ImportError:
+            pass
+    return False
+
+def cleaned_key(data_path: str) -> str:
+    return _key({"data": data_hash(data_path), "preprocessing": PREPROCESSING_HASH})
+
+def load_cleaned(data_path: str, use_cache: bool = True, store_dir: str = FEATURE_STORE_DIR, key: str = None):
+    """
+    DataFrame with the data file's Category and preprocessed cleaned_text.
+    Returns (df, key, cache_hit).
+    """
+    key = key or cleaned_key(data_path)
+    # Parquet when an engine is installed, else a pickle (both load without re-cleaning)
+    extension = "parquet" if _parquet_available() else "pkl"
+    path = os.path.join(store_dir, f"cleaned-{key}.{extension}")
+    if use_cache and os.path.exists(path):
+        df = pd.read_parquet(path) if extension == "parquet" else pd.read_pickle(path)
+        return df, key, True
+
+    df = pd.read_csv(data_path)
+    df['cleaned_text'] = preprocess_texts(df['Article'])
+    df = df[['cleaned_text', 'Category']]
+    if use_cache:
+        os.makedirs(store_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if extension == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    return df, key, False
+
+def load_features(data_path: str, vectorizer_factory, vectorizer_params: dict, test_size: float = 0.2,
+                  random_state: int = 42, stratify: bool = False, use_cache: bool = True,
+                  store_dir: str = FEATURE_STORE_DIR) -> FeatureSet:
+    """
+    Train/test TF-IDF features for `data_path`, fitted with
+    vectorizer_factory(**vectorizer_params) on the training split.
+    Built once per (data, preprocessing, vectorizer, split) and loaded
+    from the store afterwards.
+    """
+    from sklearn.model_selection import train_test_split
+
+    source_key = cleaned_key(data_path)
+    key = _key({
+        "cleaned": source_key,
+        "vectorizer": vectorizer_factory.__name__,
+        "vectorizer_params": vectorizer_params,
+        "test_size": test_size,
+        "random_state": random_state,
+        "stratify": stratify,
+    })
+    entry_dir = os.path.join(store_dir, f"features-{key}")
+    if use_cache and os.path.exists(os.path.join(entry_dir, "meta.json")):
+        labels = np.load(os.path.join(entry_dir, "labels.npz"))
+        return FeatureSet(
+            vectorizer=joblib.load(os.path.join(entry_dir, "vectorizer.joblib")),
+            X_train=sparse.load_npz(os.path.join(entry_dir, "X_train.npz")),
+            X_test=sparse.load_npz(os.path.join(entry_dir, "X_test.npz")),
+            y_train=labels["y_train"],
+            y_test=labels["y_test"],
+            key=key,
+            cache_hit=True,
+        )
+
+    df, _, _ = load_cleaned(data_path, use_cache, store_dir, key=source_key)
+    X_train, X_test, y_train, y_test = train_test_split(
+        df['cleaned_text'], df['Category'], test_size=test_size, random_state=random_state,
+        stratify=df['Category'] if stratify else None
+    )
+    vectorizer = vectorizer_factory(**vectorizer_params)
+    features = FeatureSet(
+        vectorizer=vectorizer,
+        X_train=vectorizer.fit_transform(X_train),
+        X_test=vectorizer.transform(X_test),
+        y_train=y_train.to_numpy(dtype=str),
+        y_test=y_test.to_numpy(dtype=str),
+        key=key,
+        cache_hit=False,
+    )
+    if use_cache:
+        _save_features(entry_dir, features, data_path)
+    return features
+
+def _save_features(entry_dir: str, features: FeatureSet, data_path: str):
+    # Write into a temporary directory and rename it, so readers never see half an entry
+    tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    joblib.dump(features.vectorizer, os.path.join(tmp_dir, "vectorizer.joblib"))
+    sparse.save_npz(os.path.join(tmp_dir, "X_train.npz"), features.X_train.tocsr(), compressed=False)
+    sparse.save_npz(os.path.join(tmp_dir, "X_test.npz"), features.X_test.tocsr(), compressed=False)
+    np.savez(os.path.join(tmp_dir, "labels.npz"), y_train=features.y_train, y_test=features.y_test)
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "key": features.key,
+            "data_path": data_path,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "train_shape": list(features.X_train.shape),
+            "test_shape": list(features.X_test.shape),
+        }, f, indent=2)
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another run stored the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
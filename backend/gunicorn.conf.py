@@ -0,0 +1,33 @@
+# Gunicorn configuration for running several API workers that share one
+# copy of the models.
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#
+# The app (and with MODEL_PRELOAD=1, every model) is imported once in the
+# master process before the workers are forked, so model memory is shared
+# copy-on-write instead of being duplicated per worker. Use
+# measure_memory.py to compare unique vs shared memory per worker.
+import os
+
+# Load models at import time in the master (see "Pre-fork Loading" in main.py)
+os.environ.setdefault("MODEL_PRELOAD", "1")
+# Memory-map the custom model's numpy arrays from the page cache
+os.environ.setdefault("CUSTOM_MODEL_MMAP", "1")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Loading BART in the master can take a while; don't kill slow-starting workers
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+def post_fork(server, worker):
+    # Size torch's intra-op thread pool per worker so that N workers don't
+    # oversubscribe the CPU
+    threads = os.getenv("TORCH_NUM_THREADS")
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(int(threads))
+        except ImportError:
+            pass
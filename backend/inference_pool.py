@@ -0,0 +1,34 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferencePool:
+    """
+    Dedicated thread pool for blocking model inference.
+
+    Running inference here keeps the asyncio event loop free for cheap
+    endpoints. `max_pending` bounds how many jobs may be queued or running
+    at once; further callers wait for a slot instead of growing the queue.
+    """
+    def __init__(self, name: str, max_workers: int = 1, max_pending: int = None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 4
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"{name}-inference"
+        )
+        self._slots = None
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` on the pool and await its result"""
+        # asyncio primitives must be created inside the running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
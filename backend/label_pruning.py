@@ -0,0 +1,33 @@
+"""
+Candidate-label pruning for the zero-shot classifier.
+
+The zero-shot pipeline runs one NLI forward pass per (text, label) pair.
+A cheap scorer (the custom model or the keyword rules) ranks the labels
+first and only its top-k are sent to the NLI model. When the cheap
+scorer's distribution is too flat to trust, the full label set is kept.
+"""
+from rule_based import keyword_scores
+
+def keyword_distribution(text: str) -> dict:
+    """Keyword match counts normalized to a distribution (empty if nothing matched)"""
+    scores = keyword_scores(text)
+    total = sum(scores.values())
+    if total == 0:
+        return {}
+    return {label: count / total for label, count in scores.items()}
+
+def prune_labels(distribution: dict, candidate_labels, top_k: int = 2, min_mass: float = 0.6) -> tuple:
+    """
+    Keep the `top_k` most likely candidate labels according to
+    `distribution`, in their original candidate order. Falls back to the
+    full set when those labels hold less than `min_mass` probability.
+    """
+    candidate_labels = tuple(candidate_labels)
+    if top_k >= len(candidate_labels) or not distribution:
+        return candidate_labels
+
+    ranked = sorted(candidate_labels, key=lambda label: distribution.get(label, 0.0), reverse=True)
+    kept = set(ranked[:top_k])
+    if sum(distribution.get(label, 0.0) for label in kept) < min_mass:
+        return candidate_labels
+    return tuple(label for label in candidate_labels if label in kept)
@@ -0,0 +1,227 @@
+"""
+NumPy-only scorer compiled from a fitted custom-model pipeline.
+
+The sklearn Pipeline (TfidfVectorizer + LogisticRegression) is reduced to
+plain arrays saved in an .npz file:
+
+    vocabulary   sorted array of terms (a term's position is its column)
+    idf          float32 IDF weight per column
+    coef         float32 (n_features, n_classes) weight matrix
+    intercept    float32 per-class bias
+    classes      category names
+    config       tokenizer/normalization settings (JSON)
+    source       fingerprint of the .joblib it was compiled from
+
+LinearScorer reproduces the pipeline's predict_proba (within float32
+rounding) without importing sklearn, using a fraction of the memory of the
+unpickled pipeline. Multinomial naive Bayes and log-loss SGD models compile
+the same way; other estimators (LinearSVC, random forests) can't. A scorer
+whose source doesn't match the .joblib next to it is stale and isn't loaded.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from prediction_cache import file_fingerprint
+
+SCORER_SUFFIX = ".scorer.npz"
+
+def scorer_path(model_path: str) -> str:
+    """Where the compiled scorer of `model_path` (a .joblib pipeline) lives"""
+    root, _ = os.path.splitext(model_path)
+    return root + SCORER_SUFFIX
+
+def remove_scorer(model_path: str):
+    """Delete the compiled scorer of `model_path`, e.g. one left by an earlier model"""
+    path = scorer_path(model_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+def logistic_link(clf) -> str:
+    """How a fitted LogisticRegression turns scores into probabilities ("softmax" or "ovr")"""
+    multi_class = getattr(clf, "multi_class", "auto")
+    ovr = multi_class == "ovr" or (multi_class == "auto" and clf.solver == "liblinear")
+    return "ovr" if ovr else "softmax"
+
+def compile_pipeline(pipeline) -> dict:
+    """Arrays of a LinearScorer for a fitted (vectorizer, classifier) pipeline"""
+    steps = getattr(pipeline, "steps", None)
+    if not steps or len(steps) != 2:
+        raise ValueError("Expected a two-step (vectorizer, classifier) pipeline")
+    vectorizer, clf = steps[0][1], steps[1][1]
+
+    # --- Vectorizer ---
+    if not hasattr(vectorizer, "vocabulary_"):
+        raise ValueError(f"{type(vectorizer).__name__} has no vocabulary to compile")
+    params = vectorizer.get_params()
+    if (params["analyzer"] != "word" or params["tokenizer"] or params["preprocessor"]
+            or params["strip_accents"] or re.compile(params["token_pattern"]).groups > 1):
+        raise ValueError("Only the default word analyzer (no custom tokenizer, preprocessor or accent stripping) compiles")
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    # Reorder columns so the vocabulary array is sorted (searchsorted lookups)
+    order = np.argsort(np.array(terms))
+    vocabulary = np.array(terms)[order]
+    idf = getattr(vectorizer, "idf_", None) if params.get("use_idf", False) else None
+    idf = np.ones(len(terms)) if idf is None else np.asarray(idf)
+    config = {
+        "lowercase": params["lowercase"],
+        "token_pattern": params["token_pattern"],
+        "ngram_range": list(params["ngram_range"]),
+        "binary": params["binary"],
+        "sublinear_tf": params.get("sublinear_tf", False),
+        "norm": params.get("norm"),
+    }
+    stop_words = vectorizer.get_stop_words() or ()
+
+    # --- Classifier: scores = x @ coef + intercept, then `link` ---
+    name = type(clf).__name__
+    if name == "MultinomialNB":
+        coef, intercept, link = clf.feature_log_prob_, clf.class_log_prior_, "softmax"
+    elif name == "LogisticRegression":
+        coef, intercept, link = clf.coef_, clf.intercept_, logistic_link(clf)
+        if len(clf.classes_) == 2 and link == "softmax" and getattr(clf, "multi_class", "auto") == "multinomial":
+            # sklearn scores a binary multinomial model as softmax([-d, d])
+            coef, intercept = np.vstack([-coef, coef]), np.concatenate([-intercept, intercept])
+    elif name == "SGDClassifier" and clf.loss == "log_loss":
+        coef, intercept, link = clf.coef_, clf.intercept_, "ovr"
+    else:
+        raise ValueError(f"{name} has no compilable predict_proba")
+    if coef.shape[0] == 1:
+        # Binary sigmoid model: [1 - sigmoid(d), sigmoid(d)] == softmax([0, d])
+        coef, intercept = np.vstack([np.zeros_like(coef), coef]), np.concatenate([[0.0], intercept])
+        link = "softmax"
+    config["link"] = link
+
+    return {
+        "vocabulary": vocabulary,
+        "idf": idf[order].astype(np.float32),
+        "coef": np.ascontiguousarray(np.asarray(coef)[:, order].T, dtype=np.float32),
+        "intercept": np.asarray(intercept, dtype=np.float32),
+        "classes": np.asarray(clf.classes_).astype(str),
+        "stop_words": np.array(sorted(stop_words), dtype=str),
+        "config": np.array(json.dumps(config)),
+    }
+
+def save_scorer(arrays: dict, path: str):
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+class LinearScorer:
+    """predict_proba for raw (preprocessed) texts from compiled arrays"""
+    def __init__(self, arrays):
+        self.vocabulary = arrays["vocabulary"]
+        self.idf = arrays["idf"]
+        self.coef = arrays["coef"]
+        self.intercept = arrays["intercept"]
+        self.classes_ = arrays["classes"]
+        self.stop_words = frozenset(arrays["stop_words"].tolist())
+        config = json.loads(str(arrays["config"]))
+        self.lowercase = config["lowercase"]
+        self.token_pattern = re.compile(config["token_pattern"])
+        self.min_n, self.max_n = config["ngram_range"]
+        self.binary = config["binary"]
+        self.sublinear_tf = config["sublinear_tf"]
+        self.norm = config["norm"]
+        self.link = config["link"]
+        # Scorers exported before fingerprints were recorded have no source
+        self.source = str(arrays["source"]) if "source" in arrays else ""
+
+    @classmethod
+    def load(cls, path: str) -> "LinearScorer":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def terms(self, text: str) -> list:
+        """Same terms as the vectorizer's analyzer (tokens, stop words, n-grams)"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [token for token in self.token_pattern.findall(text) if token not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+        terms = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def features(self, text: str):
+        """(columns, weights) of the document's non-zero TF-IDF entries"""
+        terms = self.terms(text)
+        if not terms:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        unique, counts = np.unique(np.array(terms), return_counts=True)
+        columns = np.searchsorted(self.vocabulary, unique)
+        columns[columns == len(self.vocabulary)] = 0
+        known = self.vocabulary[columns] == unique
+        columns, tf = columns[known], counts[known].astype(np.float64)
+        if self.binary:
+            tf[:] = 1.0
+        elif self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+        weights = tf * self.idf[columns]
+        if self.norm == "l2" and weights.size:
+            weights /= np.sqrt(np.dot(weights, weights))
+        elif self.norm == "l1" and weights.size:
+            weights /= np.abs(weights).sum()
+        return columns, weights
+
+    def decision_function(self, texts) -> np.ndarray:
+        scores = np.empty((len(texts), len(self.classes_)), dtype=np.float64)
+        for i, text in enumerate(texts):
+            columns, weights = self.features(text)
+            scores[i] = weights @ self.coef[columns] + self.intercept
+        return scores
+
+    def predict_proba(self, texts) -> np.ndarray:
+        scores = self.decision_function(texts)
+        if self.link == "ovr":
+            probabilities = 1.0 / (1.0 + np.exp(-scores))
+            # Rows where every class underflowed to 0 become uniform (as in sklearn)
+            probabilities[probabilities.sum(axis=1) == 0] = 1.0
+            return probabilities / probabilities.sum(axis=1, keepdims=True)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def predict(self, texts) -> np.ndarray:
+        return self.classes_[self.decision_function(texts).argmax(axis=1)]
+
+def check_parity(pipeline, scorer: LinearScorer, texts) -> float:
+    """Largest absolute predict_proba difference between pipeline and scorer"""
+    expected = pipeline.predict_proba(texts)
+    if list(scorer.classes_) != [str(c) for c in pipeline.classes_]:
+        raise ValueError("Scorer classes don't match the pipeline")
+    return float(np.abs(expected - scorer.predict_proba(texts)).max())
+
+def export_scorer(pipeline, model_path: str, sample_texts, tolerance: float = 1e-4):
+    """
+    Compile `pipeline` (already saved at `model_path`) next to it and check
+    it against predict_proba on `sample_texts`. Returns (scorer path, max
+    difference), or (None, reason) when the pipeline can't be compiled;
+    then any scorer an earlier model left at that path is removed.
+    """
+    try:
+        arrays = compile_pipeline(pipeline)
+    except ValueError as e:
+        remove_scorer(model_path)
+        return None, str(e)
+    arrays["source"] = np.array(file_fingerprint(model_path))
+    max_diff = check_parity(pipeline, LinearScorer(arrays), sample_texts)
+    if max_diff > tolerance:
+        remove_scorer(model_path)
+        return None, f"parity check failed (max difference {max_diff:.2e})"
+    path = scorer_path(model_path)
+    save_scorer(arrays, path)
+    return path, max_diff
+
+def load_matching_scorer(model_path: str):
+    """The compiled scorer of `model_path`, or None if it's missing or was compiled from another model"""
+    path = scorer_path(model_path)
+    if not os.path.exists(path):
+        return None
+    scorer = LinearScorer.load(path)
+    if not scorer.source or scorer.source != file_fingerprint(model_path):
+        return None
+    return scorer
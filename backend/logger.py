@@ -1,12 +1,65 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
 import os
+import queue
+import random
 from datetime import datetime
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(LOGS_DIR, exist_ok=True)
 
+# Write logs on a background thread so requests never wait on disk I/O
+LOG_ASYNC = os.getenv("LOG_ASYNC", "1") == "1"
+# Records waiting for the background thread; beyond this, records below
+# WARNING are dropped and warnings/errors are written on the calling thread
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of predictions written to predictions.log (errors are always logged)
+LOG_PREDICTION_SAMPLE_RATE = float(os.getenv("LOG_PREDICTION_SAMPLE_RATE", "1.0"))
+
+class LogTypeFilter(logging.Filter):
+    """
+    Pass only records of the given types. Records logged without a
+    `log_type` (plain logger.info/error calls) count as "api", or as
+    "error" from level ERROR up.
+    """
+    def __init__(self, *log_types):
+        super().__init__()
+        self.log_types = set(log_types)
+
+    def filter(self, record):
+        default = "error" if record.levelno >= logging.ERROR else "api"
+        return getattr(record, "log_type", default) in self.log_types
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that doesn't wait for room when the queue is full: records
+    below WARNING are dropped (and counted), warnings and errors are written
+    by `handlers` directly so failures aren't lost under load
+    """
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self.handlers = handlers
+        self.dropped = 0
+        self.written_directly = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+                return
+            self.written_directly += 1
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+_queue_handler = None
+_listener = None
+_handlers = []
+
 # Configure logging
 def setup_logging():
     """
@@ -34,6 +87,7 @@ def setup_logging():
     )
     api_handler.setLevel(logging.INFO)
     api_handler.setFormatter(formatter)
+    api_handler.addFilter(LogTypeFilter("api"))
     
     # 2. Prediction logs (separate file for ML predictions)
     prediction_handler = RotatingFileHandler(
@@ -43,6 +97,7 @@ def setup_logging():
     )
     prediction_handler.setLevel(logging.INFO)
     prediction_handler.setFormatter(formatter)
+    prediction_handler.addFilter(LogTypeFilter("prediction"))
     
     # 3. Error logs
     error_handler = RotatingFileHandler(
@@ -52,44 +107,106 @@ def setup_logging():
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(formatter)
+    error_handler.addFilter(LogTypeFilter("error"))
     
-    # 4. Console handler (for development)
+    # 4. Slow request logs (stage breakdown of requests over SLOW_REQUEST_MS)
+    slow_handler = RotatingFileHandler(
+        os.path.join(LOGS_DIR, "slow_requests.log"),
+        maxBytes=10*1024*1024,
+        backupCount=5
+    )
+    slow_handler.setLevel(logging.INFO)
+    slow_handler.setFormatter(formatter)
+    slow_handler.addFilter(LogTypeFilter("slow"))
+    
+    # 5. Console handler (for development)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
     
-    # Add handlers to logger
-    logger.addHandler(api_handler)
-    logger.addHandler(prediction_handler)
-    logger.addHandler(error_handler)
-    logger.addHandler(console_handler)
+    global _queue_handler, _handlers
+    _handlers = [api_handler, prediction_handler, error_handler, slow_handler, console_handler]
+    if LOG_ASYNC:
+        # The request path only enqueues; a listener thread runs the handlers
+        _queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE), _handlers)
+        logger.addHandler(_queue_handler)
+        start_listener()
+        atexit.register(stop_listener)
+        # Threads don't survive fork: pre-forked workers need their own listener
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_listener_in_child)
+    else:
+        for handler in _handlers:
+            logger.addHandler(handler)
     
     return logger
 
+def start_listener():
+    """(Re)start the background thread that writes queued records"""
+    global _listener
+    _listener = QueueListener(_queue_handler.queue, *_handlers, respect_handler_level=True)
+    _listener.start()
+
+def _restart_listener_in_child():
+    # Records still queued at fork time are the parent's to write
+    _queue_handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    start_listener()
+
+def stop_listener():
+    """Flush queued records and stop the background thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def logging_stats() -> dict:
+    return {
+        "async": LOG_ASYNC,
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "written_directly": _queue_handler.written_directly if _queue_handler else 0,
+        "prediction_sample_rate": LOG_PREDICTION_SAMPLE_RATE,
+    }
+
 # Initialize logger
 logger = setup_logging()
 
 def log_prediction(model_type: str, text: str, prediction: str, confidence: float):
     """
-    Log prediction details
+    Log prediction details (sampled by LOG_PREDICTION_SAMPLE_RATE)
     """
+    if LOG_PREDICTION_SAMPLE_RATE < 1.0 and random.random() >= LOG_PREDICTION_SAMPLE_RATE:
+        return
     logger.info(
         f"PREDICTION | Model: {model_type} | "
         f"Text: '{text[:50]}...' | "
-        f"Result: {prediction} ({confidence:.2%})"
+        f"Result: {prediction} ({confidence:.2%})",
+        extra={"log_type": "prediction"}
     )
 
 def log_api_request(endpoint: str, method: str, status_code: int):
     """
     Log API request
     """
-    logger.info(f"API | {method} {endpoint} - Status: {status_code}")
+    logger.info(f"API | {method} {endpoint} - Status: {status_code}", extra={"log_type": "api"})
+
+def log_slow_request(endpoint: str, method: str, status_code: int, total_ms: float, stages: dict, **info):
+    """
+    Log a slow request with its per-stage breakdown
+    """
+    breakdown = " ".join(f"{name}={ms:.1f}ms" for name, ms in stages.items())
+    details = "".join(f" | {key}: {value}" for key, value in info.items())
+    logger.warning(
+        f"SLOW | {method} {endpoint} - Status: {status_code} | "
+        f"Total: {total_ms:.1f}ms | Stages: {breakdown or '-'}{details}",
+        extra={"log_type": "slow"}
+    )
 
 def log_error(error_msg: str, exception: Exception = None):
     """
     Log error
     """
     if exception:
-        logger.error(f"ERROR | {error_msg} | Exception: {str(exception)}")
+        logger.error(f"ERROR | {error_msg} | Exception: {str(exception)}", extra={"log_type": "error"})
     else:
-        logger.error(f"ERROR | {error_msg}")
+        logger.error(f"ERROR | {error_msg}", extra={"log_type": "error"})
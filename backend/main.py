@@ -1,16 +1,51 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 import uvicorn
 from datetime import datetime, timedelta
-from logger import logger, log_prediction, log_api_request, log_error
+import time
+import numpy as np
+from logger import logger, log_prediction, log_api_request, log_error, log_slow_request, logging_stats
+import metrics
+import timing
+from batching import MicroBatcher
+from inference_pool import InferencePool
+from rule_based import RULES_VERSION, classify_texts_simple
+from label_pruning import keyword_distribution, prune_labels
+from text_preprocessing import preprocess_text, preprocess_texts
+from prediction_cache import PredictionCache, cache_key
+from article_store import ArticleStore, etag_matches, page_etag
+from recommendations import Recommender
+from model_state import ModelState
+from model_registry import current_version, list_versions, load_metadata, publish_model, resolve_artifact, set_current
+from linear_scorer import LinearScorer, export_scorer, load_matching_scorer
+from online_learning import FeedbackLearner
+from near_duplicates import NearDuplicateIndex
+from functools import partial
+from contextlib import asynccontextmanager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading models in the background and release resources on shutdown"""
+    start_model_loading()
+    watcher = asyncio.create_task(watch_model_registry()) if MODEL_WATCH_INTERVAL > 0 else None
+    learner = asyncio.create_task(run_feedback_learner()) if FEEDBACK_LEARNING else None
+    yield
+    for task in (watcher, learner):
+        if task is not None:
+            task.cancel()
+    await bert_batcher.close()
+    bert_pool.shutdown()
+    custom_pool.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="FlipItNews Advanced API",
     description="Backend for FlipItNews with BERT, Auth, and Recommendations",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -25,13 +60,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Logging Middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all incoming requests"""
-    response = await call_next(request)
+    """Log all incoming requests and record their metrics and stage timings"""
+    endpoint = metrics.route_template(request)
+    labels = metrics.start_request(endpoint)
+    timer = timing.start_timer()
+    profiler = timing.profile_sampler.start()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        elapsed = timer.elapsed()
+        metrics.finish_request(endpoint, request.method, status_code, labels, elapsed)
+        if profiler is not None:
+            path = timing.profile_sampler.stop(profiler, endpoint)
+            await asyncio.get_running_loop().run_in_executor(None, timing.dump_profile, profiler, path)
+
+    response.headers["Server-Timing"] = timer.server_timing(elapsed)
+    if timing.SLOW_REQUEST_MS and elapsed * 1000 >= timing.SLOW_REQUEST_MS:
+        log_slow_request(endpoint, request.method, status_code, elapsed * 1000, timer.breakdown(), **timer.info)
     log_api_request(request.url.path, request.method, response.status_code)
     return response
 
@@ -48,6 +101,14 @@ class NewsArticle(BaseModel):
     title: str
     content: str
     category: Optional[str] = None
+    summary: Optional[str] = None
+    published_at: Optional[datetime] = None
+
+class ArticleIngestRequest(BaseModel):
+    articles: List[NewsArticle]
+
+class ReadingHistoryRequest(BaseModel):
+    article_ids: List[int]
 
 class PredictionRequest(BaseModel):
     text: str
@@ -56,8 +117,34 @@ class PredictionResponse(BaseModel):
     category: str
     confidence: float
     model_used: str
+    model_version: Optional[str] = None
+    labels_scored: Optional[List[str]] = None
+    near_duplicate: Optional[bool] = None
+    near_duplicate_similarity: Optional[float] = None
     model_config = {'protected_namespaces': ()}
 
+class BatchPredictionRequest(BaseModel):
+    texts: List[Optional[str]]
+    model: Literal["bert", "custom", "rule-based"] = "custom"
+
+class ModelReloadRequest(BaseModel):
+    version: Optional[str] = None
+
+class FeedbackRequest(BaseModel):
+    text: str
+    category: str
+
+class BatchItemResult(BaseModel):
+    index: int
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    model: str
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
 # --- Mock Database / Services ---
 fake_users_db = {
     "user1": {"username": "user1", "password": "password123"},  # In real app, use hashed passwords
@@ -82,69 +169,414 @@ async def login_for_access_token(form_data: UserLogin):
 async def root():
     return {"message": "Welcome to FlipItNews Advanced API"}
 
-# --- Model Loading (Global) ---
-from transformers import pipeline
-import joblib
+# --- Model Loading (Background) ---
+# Models load in a background task started by the lifespan handler, so the
+# port binds immediately and cheap endpoints answer while BART is loading.
+# The heaviest imports (transformers/torch, and sklearn and joblib for the
+# custom model) happen inside the loaders; NumPy and SciPy (near-duplicate
+# index, compiled scorer, recommendations) are still imported up front.
+# /health and /ready report per-model state; prediction endpoints answer 503
+# with Retry-After until their model is ready.
+from zero_shot_engine import load_zero_shot_classifier
+import asyncio
+import gc
 import os
-import re
-import string
 
-# Load BERT model at startup (for local development)
 # Option 1: Full BART-large model (1.6GB) - Best accuracy (98%)
-print("Loading BERT model...")
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-print("BERT model loaded!")
+# ZERO_SHOT_ENGINE selects how it runs: pytorch (default), quantized (int8
+# dynamic quantization), onnx or onnx-int8 (exports from export_model.py)
+ZERO_SHOT_MODEL = "facebook/bart-large-mnli"
+ZERO_SHOT_ENGINE = os.getenv("ZERO_SHOT_ENGINE", "pytorch")
 
 # Option 2: Smaller mDeBERTa model (~600MB) - Good accuracy, less memory
-# Uncomment below and comment out Option 1 if you have memory constraints
-# print("Loading AI model...")
-# classifier = pipeline("zero-shot-classification", model="MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7")
-# print("AI model loaded!")
+# Set ZERO_SHOT_MODEL to "MoritzLaurer/mDeBERTa-v3-base-xnli-multilingual-nli-2mil7"
+# if you have memory constraints
 
-# Load custom trained model
 CUSTOM_MODEL_PATH = os.path.join(os.path.dirname(__file__), "custom_model.joblib")
+MODEL_RETRY_AFTER = os.getenv("MODEL_RETRY_AFTER", "10")
+
+classifier = None
+classifier_version = None
 custom_model = None
+custom_model_version = None
+model_states = {"zero-shot": ModelState("zero-shot"), "custom": ModelState("custom")}
+
+# --- Prediction Cache ---
+# Repeated texts (syndication, edits, retries) are served from a
+# content-addressed cache; PREDICTION_CACHE_DB enables the SQLite tier.
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL", "86400")),
+    db_path=os.getenv("PREDICTION_CACHE_DB") or None
+)
+
+# --- Near-Duplicate Detection ---
+# Zero-shot predictions of the last NEAR_DUPLICATE_WINDOW texts are indexed
+# by MinHash LSH (near_duplicates.py). A text whose estimated Jaccard
+# similarity to one of them is at least NEAR_DUPLICATE_THRESHOLD reuses its
+# prediction (near_duplicate=true in the response) instead of running BART.
+# NEAR_DUPLICATE_WINDOW=0 disables it. The 0.6 default leaves room for
+# edited copies while staying far above the similarity of distinct
+# articles; near_duplicate_report.py measures both on flipitnews-data.csv
+# and recommends a threshold.
+NEAR_DUPLICATE_WINDOW = int(os.getenv("NEAR_DUPLICATE_WINDOW", "10000"))
+near_duplicates = NearDuplicateIndex(
+    threshold=float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.6")),
+    window=NEAR_DUPLICATE_WINDOW
+) if NEAR_DUPLICATE_WINDOW > 0 else None
+
+def load_classifier():
+    global classifier, classifier_version
+    state = model_states["zero-shot"]
+    state.mark_loading()
+    print(f"Loading BERT model ({ZERO_SHOT_ENGINE} engine)...")
+    try:
+        loaded = load_zero_shot_classifier(ZERO_SHOT_MODEL, ZERO_SHOT_ENGINE)
+    except Exception as e:
+        state.mark_failed(e)
+        log_error("BERT model failed to load", e)
+        return
+    # Fingerprints tie cached entries to the loaded weights, so a new model
+    # invalidates everything cached for the old one
+    commit = getattr(loaded.model.config, '_commit_hash', None) or "local"
+    version = f"{ZERO_SHOT_MODEL}@{commit[:8]}:{ZERO_SHOT_ENGINE}"
+    prediction_cache.set_fingerprint("zero-shot", version)
+    classifier, classifier_version = loaded, version
+    state.version = version
+    state.mark_ready()
+    print(f"BERT model loaded in {state.load_seconds:.1f}s!")
+
+# --- Custom Model Registry & Hot Reload ---
+# The custom model is served from the version named in
+# model_registry/CURRENT (see model_registry.py), falling back to the legacy
+# custom_model.joblib. New versions load and warm up in the background and
+# are swapped in atomically; in-flight requests keep the model they started
+# with. Reloads are triggered by POST /admin/models/custom/reload or by the
+# registry watcher (every MODEL_WATCH_INTERVAL seconds, 0 disables it).
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "30"))
+CUSTOM_MODEL_MMAP = os.getenv("CUSTOM_MODEL_MMAP", "0") == "1"
+# CUSTOM_MODEL_SCORER=compiled serves the NumPy-only scorer exported next to
+# the artifact (linear_scorer.py) instead of unpickling the sklearn pipeline;
+# versions without one compiled from that artifact fall back to the pipeline
+CUSTOM_MODEL_SCORER = os.getenv("CUSTOM_MODEL_SCORER", "sklearn")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+WARMUP_TEXTS = [
+    "Apple announces new iPhone with revolutionary AI chip",
+    "Stock market hits record high as inflation cools down",
+    "The Lakers won the championship game last night",
+    "New movie breaks box office records opening weekend",
+    "Senate passes new bill regarding healthcare reform",
+]
+custom_reload_lock = asyncio.Lock()
+
+def resolve_custom_artifact(version: str = None):
+    """(version, path) to serve: a registry version, else the legacy custom_model.joblib"""
+    return resolve_artifact(version, legacy_path=CUSTOM_MODEL_PATH)
+
+def load_custom_artifact(path: str):
+    """Load a custom model (compiled scorer or pickled pipeline) and warm it up before it takes traffic"""
+    # A scorer left over from an earlier model would serve its weights under
+    # this model's version, so only one compiled from `path` is used
+    model = load_matching_scorer(path) if CUSTOM_MODEL_SCORER == "compiled" else None
+    if model is None:
+        import joblib
+        # With CUSTOM_MODEL_MMAP=1 the numpy arrays (IDF vector, coefficients)
+        # are memory-mapped read-only, so workers share them via the page cache
+        model = joblib.load(path, mmap_mode="r" if CUSTOM_MODEL_MMAP else None)
+    model.predict_proba(preprocess_texts(WARMUP_TEXTS))
+    return model
+
+def activate_custom_model(model, version: str, path: str):
+    """Make `model` (loaded from `path`) the served custom model"""
+    global custom_model, custom_model_version
+    prediction_cache.set_fingerprint("custom", version)
+    custom_model, custom_model_version = model, version
+    model_states["custom"].version = version
+    model_states["custom"].path = path
 
-if os.path.exists(CUSTOM_MODEL_PATH):
-    print("Loading custom trained model...")
-    custom_model = joblib.load(CUSTOM_MODEL_PATH)
-    print("Custom model loaded!")
-else:
-    print("⚠️ Custom model not found. Run train_custom_model.py first.")
-
-def preprocess_text(text):
-    """Basic text cleaning for custom model"""
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'[%s]' % re.escape(string.punctuation), '', text)
-    text = re.sub(r'\w*\d\w*', '', text)
-    return text
+async def reload_custom_model(version: str = None) -> Optional[str]:
+    """
+    Load `version` (default: the registry's CURRENT) off the event loop and
+    swap it in. Returns the version now being served.
+    """
+    state = model_states["custom"]
+    async with custom_reload_lock:
+        version, path = resolve_custom_artifact(version)
+        if version is None:
+            state.mark_missing("Custom model not found. Run train_custom_model.py first.")
+            print("⚠️ Custom model not found. Run train_custom_model.py first.")
+            return None
+        if version == custom_model_version:
+            return version
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model artifact not found at {path}")
+
+        initial_load = not state.ready
+        if initial_load:
+            state.mark_loading()
+        print(f"Loading custom trained model ({version})...")
+        try:
+            model = await asyncio.get_running_loop().run_in_executor(None, load_custom_artifact, path)
+        except Exception as e:
+            if initial_load:
+                state.mark_failed(e)
+            raise
+
+        # Swap on the event loop thread: handlers read the model and its
+        # version together, so no request sees a half-swapped state
+        activate_custom_model(model, version, path)
+        if initial_load:
+            state.mark_ready()
+        print(f"Custom model {version} is now serving!")
+        return version
+
+async def load_custom_model():
+    try:
+        await reload_custom_model()
+    except Exception as e:
+        log_error("Custom model failed to load", e)
+
+async def watch_model_registry():
+    """Reload the custom model whenever the registry's CURRENT version changes"""
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        version = current_version()
+        if version and version != custom_model_version:
+            try:
+                await reload_custom_model(version)
+            except Exception as e:
+                log_error(f"Custom model reload to {version} failed", e)
+
+def start_model_loading():
+    """Load both models in the background; the small custom model isn't queued behind BART"""
+    # Models preloaded before fork (MODEL_PRELOAD) are already settled
+    if model_states["zero-shot"].status == "pending":
+        asyncio.get_running_loop().run_in_executor(None, load_classifier)
+    if model_states["custom"].status == "pending":
+        asyncio.create_task(load_custom_model())
+
+def preload_models():
+    """
+    Load every model synchronously at import time. Under gunicorn with
+    preload_app (see gunicorn.conf.py) this happens once in the master, and
+    forked workers share the weights copy-on-write instead of each loading
+    their own copy.
+    """
+    load_classifier()
+    state = model_states["custom"]
+    version, path = resolve_custom_artifact()
+    if version is None:
+        state.mark_missing("Custom model not found. Run train_custom_model.py first.")
+        print("⚠️ Custom model not found. Run train_custom_model.py first.")
+        return
+    state.mark_loading()
+    try:
+        activate_custom_model(load_custom_artifact(path), version, path)
+    except Exception as e:
+        state.mark_failed(e)
+        log_error("Custom model failed to load", e)
+        return
+    state.mark_ready()
+
+def require_model(name: str):
+    """Fail fast with 503 (and Retry-After while loading) if a model isn't ready"""
+    state = model_states[name]
+    if state.ready:
+        return
+    if state.status == "missing" and name == "custom":
+        log_error("Custom model not available")
+        raise HTTPException(
+            status_code=503,
+            detail="Custom model not available. Please train the model first."
+        )
+    if state.settled:
+        raise HTTPException(status_code=503, detail=f"Model '{name}' failed to load: {state.error}")
+    raise HTTPException(
+        status_code=503,
+        detail=f"Model '{name}' is still loading. Please retry shortly.",
+        headers={"Retry-After": MODEL_RETRY_AFTER}
+    )
+
+# --- Inference Pools ---
+# Blocking model calls run on dedicated threads so that cheap endpoints and
+# the logging middleware never wait behind an in-flight BART forward pass.
+# The heavy BERT path and the light custom path get separate pools.
+BERT_POOL_WORKERS = int(os.getenv("BERT_POOL_WORKERS", "1"))
+CUSTOM_POOL_WORKERS = int(os.getenv("CUSTOM_POOL_WORKERS", "2"))
+bert_pool = InferencePool("bert", max_workers=BERT_POOL_WORKERS)
+custom_pool = InferencePool("custom", max_workers=CUSTOM_POOL_WORKERS)
+
+# --- BERT Micro-Batching ---
+# Concurrent /predict/bert requests are grouped into a single padded forward
+# pass of up to BERT_MAX_BATCH_SIZE texts, waiting at most BERT_MAX_WAIT_MS
+BERT_MAX_BATCH_SIZE = int(os.getenv("BERT_MAX_BATCH_SIZE", "8"))
+BERT_MAX_WAIT_MS = float(os.getenv("BERT_MAX_WAIT_MS", "10"))
+CANDIDATE_LABELS = ["Technology", "Business", "Sports", "Entertainment", "Politics"]
+
+def classify_bert_batch(items):
+    """
+    Run the zero-shot pipeline over a batch of (text, candidate_labels) items.
+    Items sharing a label set go through the pipeline in one call.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for index, (text, labels) in enumerate(items):
+        groups.setdefault(tuple(labels), []).append(index)
+
+    for labels, indices in groups.items():
+        texts = [items[i][0] for i in indices]
+        pruning_stats["pairs_scored"] += len(texts) * len(labels)
+        pruning_stats["pairs_full"] += len(texts) * len(CANDIDATE_LABELS)
+        start = time.perf_counter()
+        outputs = classifier(texts, list(labels), batch_size=len(texts) * len(labels))
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        # Tokenization, forward pass and scoring of the whole group
+        inference_seconds = time.perf_counter() - start
+        for i, output in zip(indices, outputs):
+            output["inference_seconds"] = inference_seconds
+            results[i] = output
+    return results
+
+BERT_MODEL_NAME = f"{ZERO_SHOT_MODEL} (Zero-Shot)"
+if ZERO_SHOT_ENGINE != "pytorch":
+    BERT_MODEL_NAME = f"{ZERO_SHOT_MODEL} (Zero-Shot, {ZERO_SHOT_ENGINE})"
+CUSTOM_MODEL_NAME = "Logistic Regression (Custom Trained on FlipItNews Data)"
+
+def custom_prediction(model, version: str, probabilities) -> dict:
+    """Response payload for one row of custom-model probabilities"""
+    best = probabilities.argmax()
+    return {
+        "category": str(model.classes_[best]),
+        "confidence": float(probabilities[best]),
+        "model_used": CUSTOM_MODEL_NAME,
+        "model_version": version
+    }
+
+def timed_predict_proba(model, texts):
+    """
+    predict_proba that also returns how long vectorizing (TF-IDF) and
+    classifying took, as (stage, seconds) pairs
+    """
+    start = time.perf_counter()
+    steps = getattr(model, "steps", None)
+    if not steps:
+        probabilities = model.predict_proba(texts)
+        return probabilities, [("inference", time.perf_counter() - start)]
+    features = texts
+    for _, step in steps[:-1]:
+        features = step.transform(features)
+    vectorized = time.perf_counter()
+    probabilities = steps[-1][1].predict_proba(features)
+    return probabilities, [("vectorize", vectorized - start), ("classify", time.perf_counter() - vectorized)]
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "256"))
+
+bert_batcher = MicroBatcher(
+    classify_bert_batch,
+    max_batch_size=BERT_MAX_BATCH_SIZE,
+    max_wait_ms=BERT_MAX_WAIT_MS,
+    pool=bert_pool
+)
+
+# --- Candidate-Label Pruning ---
+# With LABEL_PRUNING=custom or rule-based, a cheap scorer ranks the
+# categories and only its LABEL_PRUNING_TOP_K best are sent to the NLI
+# model (one forward pass per label). If those hold less than
+# LABEL_PRUNING_MIN_MASS of the cheap scorer's probability, all labels are
+# scored. Zero-shot confidences are relative to the labels scored.
+LABEL_PRUNING = os.getenv("LABEL_PRUNING", "off")
+LABEL_PRUNING_TOP_K = int(os.getenv("LABEL_PRUNING_TOP_K", "2"))
+LABEL_PRUNING_MIN_MASS = float(os.getenv("LABEL_PRUNING_MIN_MASS", "0.6"))
+pruning_stats = {"texts": 0, "pruned": 0, "fallbacks": 0, "pairs_scored": 0, "pairs_full": 0}
+
+def custom_distributions(model, texts):
+    """Custom-model probability distribution over categories for each text"""
+    probabilities = model.predict_proba(preprocess_texts(texts))
+    return [dict(zip(model.classes_, row)) for row in probabilities]
+
+async def candidate_label_sets(texts, distributions=None) -> list:
+    """
+    Label set to send to the zero-shot model for each text. Pass
+    `distributions` when custom-model probabilities are already at hand.
+    """
+    if LABEL_PRUNING == "off":
+        return [tuple(CANDIDATE_LABELS)] * len(texts)
+    if distributions is None:
+        model = custom_model
+        if LABEL_PRUNING == "custom" and model is not None:
+            distributions = await custom_pool.run(custom_distributions, model, texts)
+        elif LABEL_PRUNING == "rule-based":
+            distributions = [keyword_distribution(text) for text in texts]
+        else:
+            distributions = [{}] * len(texts)
+
+    label_sets = [
+        prune_labels(distribution, CANDIDATE_LABELS, LABEL_PRUNING_TOP_K, LABEL_PRUNING_MIN_MASS)
+        for distribution in distributions
+    ]
+    pruned = sum(1 for labels in label_sets if len(labels) < len(CANDIDATE_LABELS))
+    pruning_stats["texts"] += len(texts)
+    pruning_stats["pruned"] += pruned
+    pruning_stats["fallbacks"] += len(texts) - pruned
+    return label_sets
+
+async def predict_bert_cached(text: str, labels=None) -> dict:
+    """Zero-shot prediction for one text, served from the cache when possible"""
+    labels = tuple(labels or CANDIDATE_LABELS)
+
+    async def compute():
+        if near_duplicates is not None:
+            # Reuse the prediction of a recently classified near-duplicate
+            with timing.span("near_duplicate"):
+                namespace = "|".join((classifier_version, *labels))
+                signature = near_duplicates.signature(text)
+                match = near_duplicates.query(signature, namespace)
+            if match is not None:
+                prediction, similarity = match
+                return {**prediction, "near_duplicate": True, "near_duplicate_similarity": similarity}
+
+        # Perform prediction (batched with other in-flight requests)
+        start = time.perf_counter()
+        result = await bert_batcher.submit((text, labels))
+        timing.add_stage("queue", time.perf_counter() - start - result["inference_seconds"])
+        timing.add_stage("inference", result["inference_seconds"])
+        
+        # Get top prediction
+        with timing.span("postprocess"):
+            prediction = {
+                "category": result['labels'][0],
+                "confidence": result['scores'][0],
+                "model_used": BERT_MODEL_NAME,
+                "model_version": classifier_version,
+                "labels_scored": list(labels)
+            }
+            if near_duplicates is None:
+                return prediction
+            near_duplicates.add(signature, namespace, prediction)
+            return {**prediction, "near_duplicate": False}
+
+    key = cache_key(text, "zero-shot", labels)
+    return await prediction_cache.get_or_compute(key, "zero-shot", compute)
 
 @app.post("/predict/bert", response_model=PredictionResponse)
 async def predict_news_category_bert(request: PredictionRequest):
     """
     Predict news category using a Zero-Shot BERT/BART model.
     """
+    timing.mark_handler_start()
+    timing.set_info(input_length=len(request.text))
+    require_model("zero-shot")
     try:
-        candidate_labels = ["Technology", "Business", "Sports", "Entertainment", "Politics"]
-        
-        # Perform prediction
-        result = classifier(request.text, candidate_labels)
-        
-        # Get top prediction
-        top_category = result['labels'][0]
-        top_score = result['scores'][0]
+        with timing.span("labels"):
+            labels = (await candidate_label_sets([request.text]))[0]
+        prediction = await predict_bert_cached(request.text, labels)
         
         # Log prediction
-        log_prediction("BERT", request.text, top_category, top_score)
+        with timing.span("log"):
+            log_prediction("BERT", request.text, prediction["category"], prediction["confidence"])
+            metrics.record_prediction("bert", prediction["category"], prediction["confidence"])
         
-        return {
-            "category": top_category, 
-            "confidence": top_score, 
-            "model_used": "facebook/bart-large-mnli (Zero-Shot)"
-        }
+        return prediction
     except Exception as e:
         log_error("BERT prediction failed", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -155,60 +587,639 @@ async def predict_news_category_custom(request: PredictionRequest):
     Predict news category using custom trained Logistic Regression model.
     Trained on flipitnews-data.csv with 91%+ accuracy.
     """
-    if custom_model is None:
-        log_error("Custom model not available")
-        raise HTTPException(
-            status_code=503,
-            detail="Custom model not available. Please train the model first."
-        )
+    timing.mark_handler_start()
+    timing.set_info(input_length=len(request.text))
+    require_model("custom")
+    # Keep serving this version even if a new one is swapped in meanwhile
+    model, version = custom_model, custom_model_version
     
-    try:
+    async def compute():
         # Preprocess text
-        cleaned_text = preprocess_text(request.text)
-        
-        # Predict
-        prediction = custom_model.predict([cleaned_text])[0]
+        with timing.span("preprocess"):
+            cleaned_text = preprocess_text(request.text)
         
-        # Get probability scores
-        probabilities = custom_model.predict_proba([cleaned_text])[0]
-        confidence = max(probabilities)
+        # Predict (on the custom inference pool); label and confidence both
+        # come from a single predict_proba pass over the TF-IDF features
+        start = time.perf_counter()
+        probabilities, stages = await custom_pool.run(timed_predict_proba, model, [cleaned_text])
+        for stage, seconds in stages:
+            timing.add_stage(stage, seconds)
+        timing.add_stage("queue", time.perf_counter() - start - sum(seconds for _, seconds in stages))
+        with timing.span("postprocess"):
+            return custom_prediction(model, version, probabilities[0])
+
+    try:
+        key = cache_key(request.text, f"custom:{version}")
+        prediction = await prediction_cache.get_or_compute(key, "custom", compute)
         
         # Log prediction
-        log_prediction("Custom", request.text, prediction, confidence)
+        with timing.span("log"):
+            log_prediction("Custom", request.text, prediction["category"], prediction["confidence"])
+            metrics.record_prediction("custom", prediction["category"], prediction["confidence"])
         
-        return {
-            "category": prediction,
-            "confidence": float(confidence),
-            "model_used": "Logistic Regression (Custom Trained on FlipItNews Data)"
-        }
+        return prediction
     except Exception as e:
         log_error("Custom model prediction failed", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/news/feed")
-async def get_news_feed(category: Optional[str] = None):
+# --- Model Cascade ---
+# /predict/auto answers with the custom model when it is confident and only
+# escalates to the zero-shot model when the gap between its two most likely
+# categories is below CASCADE_MARGIN_THRESHOLD. Use cascade_report.py to
+# pick a threshold from labelled data.
+CASCADE_MARGIN_THRESHOLD = float(os.getenv("CASCADE_MARGIN_THRESHOLD", "0.2"))
+cascade_stats = {"requests": 0, "escalated": 0}
+
+def probability_margin(probabilities) -> float:
+    """Gap between the two most likely categories"""
+    top = sorted(probabilities, reverse=True)
+    return float(top[0] - top[1]) if len(top) > 1 else float(top[0])
+
+async def custom_probabilities_cached(text: str, model, version: str):
+    """Custom-model class probabilities for one text, served from the cache when possible"""
+    async def compute():
+        with timing.span("preprocess"):
+            cleaned_text = preprocess_text(text)
+        start = time.perf_counter()
+        probabilities, stages = await custom_pool.run(timed_predict_proba, model, [cleaned_text])
+        for stage, seconds in stages:
+            timing.add_stage(stage, seconds)
+        timing.add_stage("queue", time.perf_counter() - start - sum(seconds for _, seconds in stages))
+        return {"probabilities": [float(p) for p in probabilities[0]]}
+
+    key = cache_key(text, f"custom-probabilities:{version}")
+    cached = await prediction_cache.get_or_compute(key, "custom", compute)
+    return np.asarray(cached["probabilities"])
+
+@app.post("/predict/auto", response_model=PredictionResponse)
+async def predict_news_category_auto(request: PredictionRequest):
+    """
+    Predict news category with the cheap custom model first, escalating to
+    the Zero-Shot BERT/BART model only when the custom model is unsure.
+    """
+    timing.mark_handler_start()
+    timing.set_info(input_length=len(request.text))
+    model, version = custom_model, custom_model_version
+    if model is None:
+        require_model("zero-shot")
+    cascade_stats["requests"] += 1
+    try:
+        if model is not None:
+            probabilities = await custom_probabilities_cached(request.text, model, version)
+            if probability_margin(probabilities) >= CASCADE_MARGIN_THRESHOLD:
+                with timing.span("postprocess"):
+                    prediction = custom_prediction(model, version, probabilities)
+                with timing.span("log"):
+                    log_prediction("Auto/Custom", request.text, prediction["category"], prediction["confidence"])
+                    metrics.record_prediction("custom", prediction["category"], prediction["confidence"])
+                return prediction
+
+        require_model("zero-shot")
+        cascade_stats["escalated"] += 1
+        with timing.span("labels"):
+            if model is not None and LABEL_PRUNING == "custom":
+                # Reuse the probabilities we already have to prune the labels
+                distribution = dict(zip(model.classes_, probabilities))
+                labels = (await candidate_label_sets([request.text], [distribution]))[0]
+            else:
+                labels = (await candidate_label_sets([request.text]))[0]
+        prediction = await predict_bert_cached(request.text, labels)
+        with timing.span("log"):
+            log_prediction("Auto/BERT", request.text, prediction["category"], prediction["confidence"])
+            metrics.record_prediction("bert", prediction["category"], prediction["confidence"])
+        return prediction
+    except HTTPException:
+        raise
+    except Exception as e:
+        log_error("Auto prediction failed", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+def classify_custom_batch(model, version, texts):
     """
-    Fetch news feed, optionally filtered by category.
-    Integrates with external News APIs.
+    Score many texts with the custom model in one vectorized call:
+    a single TF-IDF transform and predict_proba over the whole list.
     """
-    # Mock data
-    news = [
-        {"id": 1, "title": "AI Breakthrough", "category": "Technology", "summary": "New transformer model released."},
-        {"id": 2, "title": "Market Rally", "category": "Business", "summary": "Stocks hit all-time high."},
-        {"id": 3, "title": "Championship Game", "category": "Sports", "summary": "Team A wins the cup."},
+    cleaned = preprocess_texts(texts)
+    probabilities = model.predict_proba(cleaned)
+    return [custom_prediction(model, version, row) for row in probabilities]
+
+def classify_bert_texts(items):
+    """Score a chunk of (text, candidate_labels) items with the zero-shot pipeline"""
+    outputs = classify_bert_batch(items)
+    return [
+        {
+            "category": output['labels'][0],
+            "confidence": output['scores'][0],
+            "model_used": BERT_MODEL_NAME,
+            "model_version": classifier_version,
+            "labels_scored": list(labels)
+        }
+        for (_, labels), output in zip(items, outputs)
     ]
-    if category:
-        return [n for n in news if n["category"].lower() == category.lower()]
-    return news
+
+def classify_rule_based_texts(texts):
+    return [{**result, "model_version": RULES_VERSION} for result in classify_texts_simple(texts)]
+
+def run_batch_isolated(fn, texts):
+    """
+    Run `fn` over the whole list; if it fails, retry item by item so that a
+    single bad input only fails itself. Failed items come back as exceptions.
+    """
+    try:
+        return list(fn(texts))
+    except Exception as e:
+        if len(texts) == 1:
+            return [e]
+    outcomes = []
+    for text in texts:
+        try:
+            outcomes.extend(fn([text]))
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_news_category_batch(request: BatchPredictionRequest):
+    """
+    Classify a list of texts in one call with the selected model.
+    Invalid or failing items are reported per item and don't fail the batch.
+    """
+    if len(request.texts) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many texts: {len(request.texts)} (max {BATCH_MAX_ITEMS})"
+        )
+    if request.model == "bert":
+        require_model("zero-shot")
+    elif request.model == "custom":
+        require_model("custom")
+
+    results = [BatchItemResult(index=i) for i in range(len(request.texts))]
+    valid = []
+    for i, text in enumerate(request.texts):
+        if text is None or not text.strip():
+            results[i].error = "Text is empty"
+        else:
+            valid.append(i)
+
+    texts = [request.texts[i] for i in valid]
+    if request.model == "bert":
+        # Serve repeated texts from the prediction cache and only send the
+        # misses through the zero-shot pipeline
+        label_sets = await candidate_label_sets(texts)
+        keys = [cache_key(text, "zero-shot", labels) for text, labels in zip(texts, label_sets)]
+        outcomes = [prediction_cache.get(key) for key in keys]
+        misses = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        miss_texts = [(texts[i], label_sets[i]) for i in misses]
+
+        # Feed the zero-shot pipeline in chunks of the micro-batch size
+        chunks = [miss_texts[i:i + BERT_MAX_BATCH_SIZE] for i in range(0, len(miss_texts), BERT_MAX_BATCH_SIZE)]
+        chunk_outcomes = await asyncio.gather(
+            *[bert_pool.run(run_batch_isolated, classify_bert_texts, chunk) for chunk in chunks]
+        )
+        computed = [outcome for chunk in chunk_outcomes for outcome in chunk]
+        for i, outcome in zip(misses, computed):
+            outcomes[i] = outcome
+            if not isinstance(outcome, Exception):
+                prediction_cache.put(keys[i], "zero-shot", outcome)
+    elif request.model == "custom":
+        scorer = partial(classify_custom_batch, custom_model, custom_model_version)
+        outcomes = await custom_pool.run(run_batch_isolated, scorer, texts) if texts else []
+    else:
+        outcomes = await custom_pool.run(run_batch_isolated, classify_rule_based_texts, texts) if texts else []
+
+    model_label = {"bert": "BERT", "custom": "Custom", "rule-based": "Rule-Based"}[request.model]
+    for i, outcome in zip(valid, outcomes):
+        if isinstance(outcome, Exception):
+            log_error(f"Batch prediction failed for item {i}", outcome)
+            results[i].error = str(outcome)
+        else:
+            log_prediction(model_label, request.texts[i], outcome["category"], outcome["confidence"])
+            metrics.record_prediction(request.model, outcome["category"], outcome["confidence"])
+            results[i].prediction = PredictionResponse(**outcome)
+
+    succeeded = sum(1 for r in results if r.prediction is not None)
+    return {
+        "model": request.model,
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }
+
+@app.get("/health")
+async def health_check():
+    """
+    Liveness: the process is up. Includes per-model load state.
+    """
+    return {
+        "status": "healthy",
+        "models": {name: state.snapshot() for name, state in model_states.items()}
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness: 200 once every model has finished loading, 503 before that
+    or if a model failed to load. A missing custom model doesn't block readiness.
+    """
+    models = {name: state.snapshot() for name, state in model_states.items()}
+    ready = all(state.ready or state.status == "missing" for state in model_states.values())
+    if not ready:
+        if any(state.status == "failed" for state in model_states.values()):
+            return JSONResponse(status_code=503, content={"status": "failed", "models": models})
+        return JSONResponse(
+            status_code=503,
+            content={"status": "loading", "models": models},
+            headers={"Retry-After": MODEL_RETRY_AFTER}
+        )
+    return {"status": "ready", "models": models}
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints need the X-Admin-Token header when ADMIN_TOKEN is set"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def custom_model_info() -> dict:
+    return {
+        "serving": custom_model_version,
+        "scorer": "compiled" if isinstance(custom_model, LinearScorer) else "sklearn",
+        "current": current_version(),
+        "metadata": load_metadata(custom_model_version) if custom_model_version in list_versions() else None,
+        "versions": list_versions(),
+    }
+
+@app.get("/admin/models/custom", dependencies=[Depends(require_admin)])
+async def get_custom_model_info():
+    """
+    Served and available versions of the custom model.
+    """
+    return custom_model_info()
+
+@app.post("/admin/models/custom/reload", dependencies=[Depends(require_admin)])
+async def reload_custom_model_endpoint(request: ModelReloadRequest = None):
+    """
+    Load, warm up and atomically swap in a custom model version. With a
+    version, it also becomes the registry's CURRENT (so watchers in other
+    workers follow); without one, the registry's CURRENT is loaded.
+    """
+    version = request.version if request else None
+    try:
+        await reload_custom_model(version)
+        if version:
+            set_current(version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        log_error("Custom model reload failed", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    return custom_model_info()
+
+# --- Online Learning from Feedback ---
+# POST /feedback records editors' category corrections (also appended to
+# FEEDBACK_LOG_PATH for full retrains); it is an admin endpoint, since
+# feedback both trains the model and makes up the held-out set that guards
+# publishing. With FEEDBACK_LEARNING=1 (and ADMIN_TOKEN set) a background
+# task applies them to an online copy of the custom model every
+# FEEDBACK_INTERVAL seconds and, every FEEDBACK_SNAPSHOT_INTERVAL seconds,
+# publishes it as a new registry version if it is no worse than the served
+# model on held-out corrections (see online_learning.py); otherwise the
+# online copy is rolled back. Other workers follow via the registry watcher.
+FEEDBACK_LEARNING = os.getenv("FEEDBACK_LEARNING", "0") == "1"
+FEEDBACK_INTERVAL = float(os.getenv("FEEDBACK_INTERVAL", "5"))
+FEEDBACK_SNAPSHOT_INTERVAL = float(os.getenv("FEEDBACK_SNAPSHOT_INTERVAL", "300"))
+feedback_learner = FeedbackLearner(
+    log_path=os.getenv("FEEDBACK_LOG_PATH", os.path.join(os.path.dirname(__file__), "feedback", "feedback.jsonl")),
+    batch_size=int(os.getenv("FEEDBACK_BATCH_SIZE", "32")),
+    holdout_every=int(os.getenv("FEEDBACK_HOLDOUT_EVERY", "5")),
+    min_holdout=int(os.getenv("FEEDBACK_MIN_HOLDOUT", "20")),
+    max_accuracy_drop=float(os.getenv("FEEDBACK_MAX_ACCURACY_DROP", "0.01")),
+    max_log_loss_increase=float(os.getenv("FEEDBACK_MAX_LOG_LOSS_INCREASE", "0.02")),
+    max_confidence_drop=float(os.getenv("FEEDBACK_MAX_CONFIDENCE_DROP", "0.02")),
+    learning_rate=float(os.getenv("FEEDBACK_LEARNING_RATE", "0.05"))
+)
+
+def load_online_base(path: str):
+    """A private, writable copy of the served pipeline (loaded from `path`) for the learner to update"""
+    import joblib
+    return joblib.load(path)
+
+def publish_feedback_snapshot(pipeline, added: int, parent_version: str) -> str:
+    """Publish the online model (with its compiled scorer) as a new registry version"""
+    import joblib
+    import tempfile
+    parent = load_metadata(parent_version) if parent_version in list_versions() else {}
+    stats = feedback_learner.snapshot_stats()
+    holdout_texts = preprocess_texts([text for text, _ in feedback_learner.holdout_items()])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The scorer records the fingerprint of the saved pipeline it came from
+        model_path = os.path.join(tmp_dir, "custom_model.joblib")
+        joblib.dump(pipeline, model_path)
+        scorer, _ = export_scorer(pipeline, model_path, holdout_texts)
+        return publish_model(pipeline, {
+            "model_name": f"{parent.get('model_name', 'Custom model')} + feedback",
+            "accuracy": parent.get("accuracy"),
+            "trained_at": datetime.now().isoformat(timespec="seconds"),
+            "parent_version": parent_version,
+            "feedback_samples": parent.get("feedback_samples", 0) + added,
+            "holdout_accuracy": stats["last_holdout_accuracy"],
+            "parent_holdout_accuracy": stats["last_served_accuracy"],
+            "holdout_log_loss": stats["last_holdout_log_loss"],
+            "parent_holdout_log_loss": stats["last_served_log_loss"],
+            "holdout_samples": stats["holdout"],
+        }, extra_files=[scorer] if scorer else [])
+
+async def apply_feedback(snapshot_due: bool):
+    """Apply buffered feedback and, when due, publish or roll back the online model"""
+    loop = asyncio.get_running_loop()
+    served, version, path = custom_model, custom_model_version, model_states["custom"].path
+    if feedback_learner.base_version != version:
+        # A new version is serving (startup, retrain or another worker's snapshot)
+        base = await loop.run_in_executor(None, load_online_base, path)
+        feedback_learner.rebase(base, version)
+    await loop.run_in_executor(None, feedback_learner.update)
+    if not snapshot_due:
+        return
+    decision = await loop.run_in_executor(None, feedback_learner.check_snapshot, served)
+    if decision == "publish":
+        pipeline, added = feedback_learner.snapshot()
+        new_version = await loop.run_in_executor(None, publish_feedback_snapshot, pipeline, added, version)
+        feedback_learner.mark_published(new_version)
+        await reload_custom_model(new_version)
+        logger.info(f"Published feedback snapshot {new_version} ({added} corrections)")
+    elif decision == "rollback":
+        stats = feedback_learner.snapshot_stats()
+        base = await loop.run_in_executor(None, load_online_base, path)
+        feedback_learner.rebase(base, version, keep_applied=False)
+        logger.warning(
+            f"Rolled back online model: held-out accuracy {stats['last_holdout_accuracy']} "
+            f"vs {stats['last_served_accuracy']} served, log-loss {stats['last_holdout_log_loss']} "
+            f"vs {stats['last_served_log_loss']}, confidence {stats['last_holdout_confidence']} "
+            f"vs {stats['last_served_confidence']}"
+        )
+
+async def run_feedback_learner():
+    if not ADMIN_TOKEN:
+        # Without a token anyone could post feedback and steer what gets published
+        logger.warning("FEEDBACK_LEARNING needs ADMIN_TOKEN; feedback is recorded but not learned from")
+        return
+    last_snapshot = time.monotonic()
+    while True:
+        await asyncio.sleep(FEEDBACK_INTERVAL)
+        if not model_states["custom"].ready:
+            continue
+        snapshot_due = time.monotonic() - last_snapshot >= FEEDBACK_SNAPSHOT_INTERVAL
+        try:
+            await apply_feedback(snapshot_due)
+        except Exception as e:
+            log_error("Applying feedback failed", e)
+        if snapshot_due:
+            last_snapshot = time.monotonic()
+
+@app.post("/feedback", status_code=202, dependencies=[Depends(require_admin)])
+async def submit_feedback(request: FeedbackRequest):
+    """
+    Record an editor's correct category for an article. The custom model
+    learns from it in the background.
+    """
+    require_model("custom")
+    if not request.text.strip():
+        raise HTTPException(status_code=422, detail="Text must not be empty")
+    categories = [str(c) for c in custom_model.classes_]
+    if request.category not in categories:
+        raise HTTPException(status_code=422, detail=f"Unknown category '{request.category}'. Expected one of {categories}")
+    # The JSONL append (and the learner's lock) stay off the event loop
+    held_out = await asyncio.get_running_loop().run_in_executor(None, feedback_learner.add, request.text, request.category)
+    return {"status": "accepted", "held_out": held_out, "learning": FEEDBACK_LEARNING and bool(ADMIN_TOKEN)}
+
+@app.get("/stats/feedback")
+async def get_feedback_stats():
+    """
+    Feedback received, applied and held out, and the outcome of the last
+    snapshot check.
+    """
+    return {**feedback_learner.snapshot_stats(), "learning": FEEDBACK_LEARNING and bool(ADMIN_TOKEN)}
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Request, latency and prediction metrics of this worker in the
+    Prometheus text format.
+    """
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/stats/batching")
+async def get_batching_stats():
+    """
+    Batch fill statistics for the BERT micro-batching queue.
+    """
+    return bert_batcher.stats.snapshot()
+
+@app.get("/stats/cache")
+async def get_cache_stats():
+    """
+    Hit/miss counters for the prediction cache.
+    """
+    return prediction_cache.stats()
+
+@app.get("/stats/near-duplicates")
+async def get_near_duplicate_stats():
+    """
+    Lookups, reuse rate and window size of the near-duplicate index.
+    """
+    if near_duplicates is None:
+        return {"enabled": False}
+    return {"enabled": True, **near_duplicates.stats()}
+
+@app.get("/stats/cascade")
+async def get_cascade_stats():
+    """
+    Escalation rate of the /predict/auto model cascade.
+    """
+    requests = cascade_stats["requests"]
+    return {
+        **cascade_stats,
+        "margin_threshold": CASCADE_MARGIN_THRESHOLD,
+        "escalation_rate": round(cascade_stats["escalated"] / requests, 3) if requests else 0.0
+    }
+
+@app.get("/stats/label-pruning")
+async def get_label_pruning_stats():
+    """
+    How many zero-shot (text, label) forward passes label pruning saved.
+    """
+    full = pruning_stats["pairs_full"]
+    return {
+        **pruning_stats,
+        "mode": LABEL_PRUNING,
+        "top_k": LABEL_PRUNING_TOP_K,
+        "pair_reduction": round(1 - pruning_stats["pairs_scored"] / full, 3) if full else 0.0
+    }
+
+@app.get("/stats/logging")
+async def get_logging_stats():
+    """
+    Background log queue depth, records dropped under overload and the
+    prediction log sampling rate.
+    """
+    return logging_stats()
+
+# --- Article Store ---
+# Articles are classified with the custom model (in one batch) when they are
+# ingested and stored in SQLite (ARTICLE_DB_PATH); the feed serves pages
+# from the store's indexes and never runs a model.
+article_store = ArticleStore(os.getenv("ARTICLE_DB_PATH", os.path.join(os.path.dirname(__file__), "articles.db")))
+# An empty store starts with the articles the feed used to return
+SEED_ARTICLES = [
+    {"title": "AI Breakthrough", "category": "Technology", "content": "New transformer model released."},
+    {"title": "Market Rally", "category": "Business", "content": "Stocks hit all-time high."},
+    {"title": "Championship Game", "category": "Sports", "content": "Team A wins the cup."},
+]
+article_store.seed(SEED_ARTICLES)
+
+@app.post("/news/articles", status_code=201, dependencies=[Depends(require_admin)])
+async def ingest_articles(request: ArticleIngestRequest):
+    """
+    Add articles to the feed. Articles without a category are classified
+    with the custom model.
+    """
+    if len(request.articles) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} articles per request")
+    articles = [article.model_dump() for article in request.articles]
+    to_classify = [i for i, article in enumerate(articles) if not article["category"]]
+    predictions = [None] * len(articles)
+    if to_classify:
+        require_model("custom")
+        model, version = custom_model, custom_model_version
+        texts = [f"{articles[i]['title']}. {articles[i]['content']}" for i in to_classify]
+        try:
+            results = await custom_pool.run(classify_custom_batch, model, version, texts)
+        except Exception as e:
+            log_error("Article classification failed", e)
+            raise HTTPException(status_code=500, detail=str(e))
+        for i, result in zip(to_classify, results):
+            predictions[i] = result
+            metrics.record_prediction("custom", result["category"], result["confidence"])
+    ids = article_store.add_articles(articles, predictions)
+    await index_new_articles([
+        (article_id, (prediction or article)["category"], article["title"], article["content"])
+        for article_id, article, prediction in zip(ids, articles, predictions)
+    ])
+    return {
+        "ingested": len(ids),
+        "articles": [
+            {"id": article_id, "category": (prediction or article)["category"],
+             "confidence": prediction["confidence"] if prediction else None}
+            for article_id, article, prediction in zip(ids, articles, predictions)
+        ]
+    }
+
+@app.get("/news/feed")
+async def get_news_feed(
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Fetch news feed (a list of articles), newest first, optionally filtered
+    by category. Pass a page's X-Next-Cursor header as `cursor` to get the
+    next one. Pages carry an ETag; send it back in If-None-Match to get 304
+    when unchanged.
+    """
+    try:
+        page = article_store.page(category, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = page_etag(page)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if page["next_cursor"]:
+        headers["X-Next-Cursor"] = page["next_cursor"]
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    # The body stays a plain list of articles, as before pagination
+    return JSONResponse(page["items"], headers=headers)
+
+# --- Recommendations ---
+# Articles in the store are embedded with the custom model's TF-IDF
+# vectorizer into a per-category sparse index (recommendations.py), built
+# lazily and rebuilt when a new custom model version is served. Profiles
+# follow POST /users/{user_id}/history; results are cached per user until
+# their history or the index changes.
+recommender = Recommender(
+    article_store,
+    top_categories=int(os.getenv("RECOMMENDER_TOP_CATEGORIES", "2")),
+    profile_terms=int(os.getenv("RECOMMENDER_PROFILE_TERMS", "64")),
+    decay=float(os.getenv("RECOMMENDER_HISTORY_DECAY", "0.95")),
+    approx_min_articles=int(os.getenv("RECOMMENDER_APPROX_MIN_ARTICLES", "20000")),
+    cache_users=int(os.getenv("RECOMMENDER_CACHE_USERS", "10000"))
+)
+recommender_lock = asyncio.Lock()
+
+async def ensure_recommendation_index():
+    """Build the index for the served custom model if it isn't current"""
+    require_model("custom")
+    async with recommender_lock:
+        model, version = custom_model, custom_model_version
+        if recommender.index is None or recommender.index.version != version:
+            # A full build can take a while; keep it off the prediction pool
+            index = await asyncio.get_running_loop().run_in_executor(None, recommender.build_index, model, version)
+            recommender.use_index(index)
+
+async def index_new_articles(articles):
+    """Add freshly ingested articles to a current index (a stale one is rebuilt on next use)"""
+    async with recommender_lock:
+        index, model = recommender.index, custom_model
+        if index is None or index.version != custom_model_version:
+            return
+        recommender.use_index(await custom_pool.run(index.with_articles, model, articles))
+
+@app.post("/users/{user_id}/history")
+async def record_reading_history(user_id: str, request: ReadingHistoryRequest):
+    """
+    Record articles a user read; their recommendations follow immediately.
+    """
+    await ensure_recommendation_index()
+    recorded = recommender.record_reads(user_id, request.article_ids)
+    unknown = sorted(set(request.article_ids) - set(recorded))
+    return {"user_id": user_id, "recorded": len(recorded), "unknown_article_ids": unknown}
 
 @app.get("/recommendations/{user_id}")
-async def get_recommendations(user_id: str):
+async def get_recommendations(user_id: str, k: int = Query(10, ge=1, le=50), category: Optional[str] = None):
     """
     Get personalized news recommendations based on user history.
+    When nothing matches, users get the latest articles they haven't read.
     """
+    timing.mark_handler_start()
+    with timing.span("index"):
+        await ensure_recommendation_index()
+    with timing.span("search"):
+        ranked = recommender.recommend(user_id, k, category)
+    if not ranked:
+        # Over-fetch by the user's history so k unread articles remain
+        read = recommender.read_articles(user_id)
+        latest = [item for item in article_store.page(category, k + len(read))["items"] if item["id"] not in read]
+        return [{**item, "score": None, "reason": "Latest news"} for item in latest[:k]]
+    articles = article_store.get_articles(article_id for article_id, _ in ranked)
     return [
-        {"id": 4, "title": "Recommended: Python 3.12 Features", "category": "Technology", "reason": "Based on your reading history"}
+        {**articles[article_id], "score": score, "reason": "Based on your reading history"}
+        for article_id, score in ranked if article_id in articles
     ]
 
+@app.get("/stats/recommendations")
+async def get_recommendation_stats():
+    """
+    Index size, cache hits and profiles held by the recommender.
+    """
+    return recommender.stats()
+
+# --- Pre-fork Loading ---
+# MODEL_PRELOAD=1 loads the models while the module is imported. gc.freeze()
+# then moves everything allocated so far out of the collector's reach, so
+# garbage collections in the workers don't write to (and un-share) the
+# pages holding the model objects.
+if os.getenv("MODEL_PRELOAD", "0") == "1":
+    preload_models()
+    gc.freeze()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
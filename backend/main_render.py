@@ -1,10 +1,15 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 import uvicorn
+import os
 from datetime import datetime, timedelta
-import re
+import time
+import metrics
+from rule_based import RULES_VERSION, classify_text_simple, classify_texts_simple
+from article_store import ArticleStore, etag_matches, page_etag
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -26,8 +31,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# Metrics Middleware
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Record request counts and latency for /metrics"""
+    endpoint = metrics.route_template(request)
+    labels = metrics.start_request(endpoint)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.finish_request(endpoint, request.method, 500, labels, time.perf_counter() - start)
+        raise
+    metrics.finish_request(endpoint, request.method, response.status_code, labels, time.perf_counter() - start)
+    return response
+
 # --- Models ---
 class UserLogin(BaseModel):
     username: str
@@ -41,6 +62,11 @@ class NewsArticle(BaseModel):
     title: str
     content: str
     category: Optional[str] = None
+    summary: Optional[str] = None
+    published_at: Optional[datetime] = None
+
+class ArticleIngestRequest(BaseModel):
+    articles: List[NewsArticle]
 
 class PredictionRequest(BaseModel):
     text: str
@@ -49,8 +75,28 @@ class PredictionResponse(BaseModel):
     category: str
     confidence: float
     model_used: str
+    # Same fields as main.py's responses; only model_version applies to the rule-based classifier
+    model_version: Optional[str] = None
+    labels_scored: Optional[List[str]] = None
+    near_duplicate: Optional[bool] = None
+    near_duplicate_similarity: Optional[float] = None
     model_config = {'protected_namespaces': ()}
 
+class BatchPredictionRequest(BaseModel):
+    texts: List[Optional[str]]
+    model: Literal["bert", "custom", "rule-based"] = "rule-based"
+
+class BatchItemResult(BaseModel):
+    index: int
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    model: str
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
 # --- Mock Database / Services ---
 fake_users_db = {
     "user1": {"username": "user1", "password": "password123"},
@@ -73,48 +119,6 @@ async def login_for_access_token(form_data: UserLogin):
 async def root():
     return {"message": "Welcome to FlipItNews Advanced API (Render Optimized)"}
 
-# --- Simple Rule-Based Classifier (No AI Model Required) ---
-def classify_text_simple(text: str) -> dict:
-    """
-    Simple keyword-based classifier for demo purposes.
-    Uses no AI model to save memory on Render free tier.
-    """
-    text_lower = text.lower()
-    
-    # Define keywords for each category
-    tech_keywords = ['ai', 'technology', 'software', 'app', 'iphone', 'android', 'computer', 'tech', 'digital', 'cyber', 'robot', 'chip', 'apple', 'google', 'microsoft']
-    business_keywords = ['stock', 'market', 'business', 'economy', 'finance', 'company', 'earnings', 'profit', 'investment', 'trade', 'dollar', 'bitcoin', 'crypto']
-    sports_keywords = ['game', 'championship', 'team', 'player', 'win', 'score', 'sports', 'football', 'basketball', 'soccer', 'olympics', 'league', 'coach']
-    entertainment_keywords = ['movie', 'film', 'actor', 'music', 'concert', 'celebrity', 'entertainment', 'show', 'series', 'album', 'box office', 'hollywood']
-    politics_keywords = ['senate', 'congress', 'president', 'election', 'vote', 'government', 'politics', 'law', 'bill', 'policy', 'minister', 'parliament']
-    
-    # Count matches for each category
-    scores = {
-        'Technology': sum(1 for kw in tech_keywords if kw in text_lower),
-        'Business': sum(1 for kw in business_keywords if kw in text_lower),
-        'Sports': sum(1 for kw in sports_keywords if kw in text_lower),
-        'Entertainment': sum(1 for kw in entertainment_keywords if kw in text_lower),
-        'Politics': sum(1 for kw in politics_keywords if kw in text_lower),
-    }
-    
-    # Get category with highest score
-    category = max(scores, key=scores.get)
-    max_score = scores[category]
-    
-    # Calculate confidence (0.6 to 0.95 range)
-    if max_score == 0:
-        category = "Technology"  # Default
-        confidence = 0.65
-    else:
-        total_keywords = sum(scores.values())
-        confidence = min(0.95, 0.60 + (max_score / max(total_keywords, 1)) * 0.35)
-    
-    return {
-        "category": category,
-        "confidence": confidence,
-        "model_used": "Rule-Based Classifier (Render Optimized)"
-    }
-
 @app.post("/predict/bert", response_model=PredictionResponse)
 async def predict_bert(request: PredictionRequest):
     """
@@ -122,7 +126,8 @@ async def predict_bert(request: PredictionRequest):
     """
     try:
         result = classify_text_simple(request.text)
-        return result
+        metrics.record_prediction("rule-based", result["category"], result["confidence"])
+        return {**result, "model_version": RULES_VERSION}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
@@ -133,16 +138,122 @@ async def predict_custom(request: PredictionRequest):
     """
     return await predict_bert(request)
 
+BATCH_MAX_ITEMS = 256
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest):
+    """
+    Classify a list of texts with the rule-based classifier.
+    Every model selector maps to the rule-based classifier on Render.
+    """
+    if len(request.texts) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many texts: {len(request.texts)} (max {BATCH_MAX_ITEMS})"
+        )
+
+    results = [BatchItemResult(index=i) for i in range(len(request.texts))]
+    valid = []
+    for item, text in zip(results, request.texts):
+        if text is None or not text.strip():
+            item.error = "Text is empty"
+        else:
+            valid.append((item, text))
+
+    try:
+        predictions = classify_texts_simple([text for _, text in valid])
+    except Exception as e:
+        predictions = [e] * len(valid)
+    for (item, _), prediction in zip(valid, predictions):
+        if isinstance(prediction, Exception):
+            item.error = f"Prediction failed: {str(prediction)}"
+        else:
+            item.prediction = PredictionResponse(**prediction, model_version=RULES_VERSION)
+            metrics.record_prediction("rule-based", prediction["category"], prediction["confidence"])
+
+    succeeded = sum(1 for r in results if r.prediction is not None)
+    return {
+        "model": "rule-based",
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Request, latency and prediction metrics in the Prometheus text format.
+    """
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+# --- Article Store ---
+# Articles are classified with the rule-based classifier when they are
+# ingested and stored in SQLite (ARTICLE_DB_PATH); /news serves pages from
+# the store's indexes.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+article_store = ArticleStore(os.getenv("ARTICLE_DB_PATH", os.path.join(os.path.dirname(__file__), "articles.db")))
+# An empty store starts with the articles the feed used to return
+SEED_ARTICLES = [
+    {"title": "AI Breakthrough", "category": "Technology", "content": "New AI model achieves 98% accuracy."},
+    {"title": "Stock Market Surge", "category": "Business", "content": "Markets hit all-time high."},
+    {"title": "Championship Win", "category": "Sports", "content": "Team wins in overtime thriller."},
+]
+article_store.seed(SEED_ARTICLES)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Ingestion needs the X-Admin-Token header when ADMIN_TOKEN is set"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/news/articles", status_code=201, dependencies=[Depends(require_admin)])
+async def ingest_articles(request: ArticleIngestRequest):
+    """
+    Add articles to the feed. Articles without a category are classified
+    with the rule-based classifier.
+    """
+    if len(request.articles) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} articles per request")
+    articles = [article.model_dump() for article in request.articles]
+    to_classify = [i for i, article in enumerate(articles) if not article["category"]]
+    predictions = [None] * len(articles)
+    results = classify_texts_simple([f"{articles[i]['title']}. {articles[i]['content']}" for i in to_classify])
+    for i, result in zip(to_classify, results):
+        predictions[i] = {**result, "model_version": RULES_VERSION}
+        metrics.record_prediction("rule-based", result["category"], result["confidence"])
+    ids = article_store.add_articles(articles, predictions)
+    return {
+        "ingested": len(ids),
+        "articles": [
+            {"id": article_id, "category": (prediction or article)["category"],
+             "confidence": prediction["confidence"] if prediction else None}
+            for article_id, article, prediction in zip(ids, articles, predictions)
+        ]
+    }
+
 @app.get("/news")
-async def get_news():
+async def get_news(
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+):
     """
-    Get latest news articles (mock data).
+    Get latest news articles, newest first, optionally filtered by category.
+    Pass the X-Next-Cursor header as `cursor` for the next page; send the
+    ETag back in If-None-Match to get 304 when the page is unchanged.
     """
-    return [
-        {"id": 1, "title": "AI Breakthrough", "category": "Technology", "summary": "New AI model achieves 98% accuracy."},
-        {"id": 2, "title": "Stock Market Surge", "category": "Business", "summary": "Markets hit all-time high."},
-        {"id": 3, "title": "Championship Win", "category": "Sports", "summary": "Team wins in overtime thriller."},
-    ]
+    try:
+        page = article_store.page(category, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = page_etag(page)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if page["next_cursor"]:
+        headers["X-Next-Cursor"] = page["next_cursor"]
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    # The body stays a plain list of articles, as before pagination
+    return JSONResponse(page["items"], headers=headers)
 
 @app.get("/recommendations/{user_id}")
 async def get_recommendations(user_id: str):
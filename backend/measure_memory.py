@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+
+def smaps_rollup(pid: int) -> dict:
+    """Memory counters (in kB) from /proc/<pid>/smaps_rollup"""
+    counters = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                counters[parts[0][:-1]] = int(parts[1])
+    return counters
+
+def children_of(pid: int) -> list:
+    """Direct child processes (the workers of a gunicorn master)"""
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        path = f"/proc/{pid}/task/{task}/children"
+        if os.path.exists(path):
+            with open(path) as f:
+                children.extend(int(child) for child in f.read().split())
+    return sorted(set(children))
+
+def process_name(pid: int) -> str:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode(errors="replace").strip()[:50]
+
+def measure(pids: list):
+    """
+    Per-process memory split:
+      RSS     resident pages, shared ones counted in full
+      PSS     shared pages divided among the processes sharing them
+      Unique  pages only this process maps (what a new worker really costs)
+      Shared  pages mapped by other processes too (e.g. model weights
+              inherited copy-on-write from a preloading master)
+    """
+    rows = []
+    for pid in pids:
+        try:
+            m = smaps_rollup(pid)
+        except (FileNotFoundError, PermissionError) as e:
+            print(f"⚠️ Skipping pid {pid}: {e}")
+            continue
+        rows.append({
+            "pid": pid,
+            "name": process_name(pid),
+            "rss": m.get("Rss", 0),
+            "pss": m.get("Pss", 0),
+            "unique": m.get("Private_Clean", 0) + m.get("Private_Dirty", 0),
+            "shared": m.get("Shared_Clean", 0) + m.get("Shared_Dirty", 0),
+        })
+
+    mb = lambda kb: kb / 1024
+    print("=" * 100)
+    print(f"{'PID':>8s} {'RSS MB':>10s} {'PSS MB':>10s} {'Unique MB':>10s} {'Shared MB':>10s}  Command")
+    print("=" * 100)
+    for row in rows:
+        print(f"{row['pid']:8d} {mb(row['rss']):10.1f} {mb(row['pss']):10.1f} "
+              f"{mb(row['unique']):10.1f} {mb(row['shared']):10.1f}  {row['name']}")
+    print("=" * 100)
+
+    total_rss = sum(row['rss'] for row in rows)
+    total_pss = sum(row['pss'] for row in rows)
+    print(f"Sum of RSS: {mb(total_rss):.1f} MB (what N separate copies would cost)")
+    print(f"Sum of PSS: {mb(total_pss):.1f} MB (actual memory used by these processes)")
+    if total_rss:
+        print(f"Saved by sharing: {mb(total_rss - total_pss):.1f} MB ({(1 - total_pss / total_rss) * 100:.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report unique vs shared memory of API worker processes (Linux only)"
+    )
+    parser.add_argument("pids", nargs="*", type=int, help="Process ids to measure")
+    parser.add_argument("--master", type=int, help="gunicorn master pid; measures it and all its workers")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("❌ /proc/<pid>/smaps_rollup is required (Linux 4.14+)")
+        sys.exit(1)
+
+    pids = list(args.pids)
+    if args.master:
+        pids = [args.master] + children_of(args.master) + pids
+    if not pids:
+        parser.error("give worker pids or --master <pid>")
+    measure(pids)
@@ -0,0 +1,129 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+All updates happen on the event loop thread (from the HTTP middleware and
+the prediction endpoints), so plain dict increments are safe without
+locks. Each worker process keeps its own numbers; scrape every worker (or
+run a single one) when running several behind gunicorn.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+ROUTE_CACHE_SIZE = 1024
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by metric name and label values"""
+    def __init__(self):
+        self.definitions = {}
+        self.values = {}
+
+    def describe(self, name: str, kind: str, help_text: str, labelnames=(), buckets=None):
+        self.definitions[name] = (kind, help_text, tuple(labelnames), buckets)
+        self.values[name] = {}
+
+    def inc(self, name: str, labels=(), value: float = 1):
+        series = self.values[name]
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, labels, value: float):
+        series = self.values[name].get(labels)
+        if series is None:
+            buckets = self.definitions[name][3]
+            # [per-bucket counts (last one is +Inf), sum, count]
+            series = self.values[name][labels] = [[0] * (len(buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.definitions[name][3], value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help_text, labelnames, buckets) in self.definitions.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in self.values[name].items():
+                pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, labels)]
+                if kind != "histogram":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    le_pair = f'le="{le}"'
+                    lines.append(f"{name}_bucket{_labels(pairs + [le_pair])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(pairs)} {count}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(pairs) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+registry = MetricsRegistry()
+registry.describe("flipitnews_requests_total", "counter", "HTTP requests handled",
+                  ("endpoint", "method", "model", "status"))
+registry.describe("flipitnews_requests_in_flight", "gauge", "HTTP requests currently being handled",
+                  ("endpoint",))
+registry.describe("flipitnews_request_duration_seconds", "histogram", "HTTP request latency",
+                  ("endpoint", "model", "status"), LATENCY_BUCKETS)
+registry.describe("flipitnews_predictions_total", "counter", "Predictions returned per category",
+                  ("model", "category"))
+registry.describe("flipitnews_prediction_confidence", "histogram", "Confidence of returned predictions",
+                  ("model",), CONFIDENCE_BUCKETS)
+registry.describe("flipitnews_process_start_time_seconds", "gauge", "Start time of this worker (unix epoch)")
+registry.inc("flipitnews_process_start_time_seconds", (), time.time())
+
+# Labels of the request being handled; the endpoint fills in "model"
+_request_labels = ContextVar("request_labels", default=None)
+_route_cache = {}
+
+def route_template(request) -> str:
+    """
+    Path template of the route serving `request` (e.g. /recommendations/{user_id})
+    so that path parameters don't explode the number of series.
+    """
+    path = request.url.path
+    template = _route_cache.get(path)
+    if template is None:
+        template = "unmatched"
+        for route in request.app.router.routes:
+            match, _ = route.matches(request.scope)
+            # PARTIAL: the path matches but not the method (405)
+            if match != Match.NONE:
+                template = getattr(route, "path", path)
+                break
+        if len(_route_cache) < ROUTE_CACHE_SIZE:
+            _route_cache[path] = template
+    return template
+
+def start_request(endpoint: str) -> dict:
+    registry.inc("flipitnews_requests_in_flight", (endpoint,))
+    labels = {"model": "none"}
+    _request_labels.set(labels)
+    return labels
+
+def finish_request(endpoint: str, method: str, status_code: int, labels: dict, seconds: float):
+    status_code = str(status_code)
+    registry.inc("flipitnews_requests_in_flight", (endpoint,), -1)
+    registry.inc("flipitnews_requests_total", (endpoint, method, labels["model"], status_code))
+    registry.observe("flipitnews_request_duration_seconds", (endpoint, labels["model"], status_code), seconds)
+
+def record_prediction(model: str, category: str, confidence: float):
+    """Count a returned prediction and tag the current request with its model"""
+    labels = _request_labels.get()
+    if labels is not None:
+        labels["model"] = model
+    registry.inc("flipitnews_predictions_total", (model, category))
+    registry.observe("flipitnews_prediction_confidence", (model,), confidence)
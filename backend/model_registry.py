@@ -0,0 +1,115 @@
+"""
+Versioned artifact registry for the custom model.
+
+    model_registry/
+        CURRENT                      <- name of the active version
+        20261018-101500/
+            custom_model.joblib
+            custom_model.scorer.npz  <- compiled NumPy scorer (linear_scorer.py)
+            metadata.json            <- accuracy, trained_at, data_hash, ...
+
+Training scripts publish new versions here; the API loads the version
+named in CURRENT and swaps to a new one without restarting. Without a
+registry, the unversioned custom_model.joblib next to this file is served
+as version legacy-<content hash>.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+from prediction_cache import file_fingerprint
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(BASE_DIR, "model_registry"))
+ARTIFACT_NAME = "custom_model.joblib"
+METADATA_NAME = "metadata.json"
+CURRENT_NAME = "CURRENT"
+LEGACY_ARTIFACT_PATH = os.path.join(BASE_DIR, ARTIFACT_NAME)
+LEGACY_VERSION_PREFIX = "legacy-"
+
+def data_hash(path: str) -> str:
+    """SHA-256 of a training data file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def artifact_path(version: str, registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(registry_dir, version, ARTIFACT_NAME)
+
+def load_metadata(version: str, registry_dir: str = REGISTRY_DIR) -> dict:
+    path = os.path.join(registry_dir, version, METADATA_NAME)
+    if not os.path.exists(path):
+        return {"version": version}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> list:
+    """Published versions, oldest first"""
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if os.path.exists(artifact_path(name, registry_dir))
+    )
+
+def current_version(registry_dir: str = REGISTRY_DIR):
+    """Active version, or None when nothing has been published"""
+    path = os.path.join(registry_dir, CURRENT_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        version = f.read().strip()
+    return version or None
+
+def set_current(version: str, registry_dir: str = REGISTRY_DIR):
+    """Point CURRENT at `version` (atomic rename, safe for concurrent readers)"""
+    if not os.path.exists(artifact_path(version, registry_dir)):
+        raise FileNotFoundError(f"Model version '{version}' not found in {registry_dir}")
+    tmp_path = os.path.join(registry_dir, CURRENT_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(registry_dir, CURRENT_NAME))
+
+def resolve_artifact(version: str = None, registry_dir: str = REGISTRY_DIR,
+                     legacy_path: str = LEGACY_ARTIFACT_PATH):
+    """(version, path) to serve: a registry version, else the legacy custom_model.joblib"""
+    version = version or current_version(registry_dir)
+    if version and version.startswith(LEGACY_VERSION_PREFIX):
+        # Legacy versions name the unversioned file, not a registry directory
+        return version, legacy_path
+    if version:
+        return version, artifact_path(version, registry_dir)
+    if os.path.exists(legacy_path):
+        return f"{LEGACY_VERSION_PREFIX}{file_fingerprint(legacy_path)[:12]}", legacy_path
+    return None, None
+
+def publish_model(pipeline, metadata: dict, activate: bool = True, registry_dir: str = REGISTRY_DIR,
+                  extra_files=()) -> str:
+    """
+    Save a fitted pipeline as a new version with its metadata and, by
+    default, make it the active version. `extra_files` (e.g. the compiled
+    scorer) are copied into the version directory. Returns the version name.
+    """
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while os.path.exists(os.path.join(registry_dir, version)):
+        suffix += 1
+        version = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+
+    import joblib
+    version_dir = os.path.join(registry_dir, version)
+    os.makedirs(version_dir)
+    joblib.dump(pipeline, os.path.join(version_dir, ARTIFACT_NAME))
+    for path in extra_files:
+        shutil.copy2(path, os.path.join(version_dir, os.path.basename(path)))
+    metadata = {"version": version, "published_at": datetime.now().isoformat(timespec="seconds"), **metadata}
+    with open(os.path.join(version_dir, METADATA_NAME), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+    if activate:
+        set_current(version, registry_dir)
+    return version
@@ -0,0 +1,48 @@
+import time
+
+
+class ModelState:
+    """
+    Load state of one model: pending -> loading -> ready | failed | missing
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "pending"
+        self.error = None
+        self.load_seconds = None
+        self.version = None
+        self.path = None  # artifact the served version was loaded from
+        self._started = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def settled(self) -> bool:
+        """True once loading has finished one way or another"""
+        return self.status in ("ready", "failed", "missing")
+
+    def mark_loading(self):
+        self.status = "loading"
+        self.error = None
+        self._started = time.perf_counter()
+
+    def mark_ready(self):
+        self.status = "ready"
+        self.load_seconds = round(time.perf_counter() - self._started, 3) if self._started else None
+
+    def mark_failed(self, exception: Exception):
+        self.status = "failed"
+        self.error = str(exception)
+        self.load_seconds = round(time.perf_counter() - self._started, 3) if self._started else None
+
+    def mark_missing(self, reason: str):
+        self.status = "missing"
+        self.error = reason
+
+    def snapshot(self) -> dict:
+        snapshot = {"status": self.status, "version": self.version, "load_seconds": self.load_seconds}
+        if self.error:
+            snapshot["error"] = self.error
+        return snapshot
@@ -0,0 +1,150 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import time
+from near_duplicates import NearDuplicateIndex, jaccard, shingles
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "flipitnews-data.csv")
+BOILERPLATE = [
+    "Follow us for more updates.",
+    "Copyright FlipItNews. All rights reserved.",
+    "This story was first published by a partner site.",
+]
+
+def syndicated_copy(text, rng, edit_rate):
+    """
+    A copy of `text` as a syndication feed would send it: a byline and
+    timestamp, a boilerplate footer and `edit_rate` of the words edited
+    """
+    words = text.split()
+    for i in rng.choice(len(words), size=int(len(words) * edit_rate), replace=False):
+        words[i] = rng.choice(["", words[i].upper(), words[i] + ","])
+    byline = f"By Staff Reporter | Updated {rng.integers(1, 28)}/{rng.integers(1, 13)}/2024 {rng.integers(0, 24)}:{rng.integers(10, 60)}"
+    return f"{byline} {' '.join(w for w in words if w)} {rng.choice(BOILERPLATE)}"
+
+def evaluate(threshold, window, originals, copies, true_jaccard, distinct):
+    """
+    Index `originals` (text, category) and query the copies and the distinct
+    articles. Returns recall, false positive rate and label agreement.
+    """
+    index = NearDuplicateIndex(threshold=threshold, window=window)
+    for text, category in originals:
+        index.add(index.signature(text), "report", category)
+
+    start = time.perf_counter()
+    matches = [index.query(index.signature(text), "report") for text, _ in copies]
+    query_ms = (time.perf_counter() - start) * 1000 / len(copies)
+    found = np.array([match is not None for match in matches])
+    agree = np.array([match is not None and match[0] == category for match, (_, category) in zip(matches, copies)])
+    above = true_jaccard >= threshold
+
+    false_positives = sum(index.query(index.signature(text), "report") is not None for text, _ in distinct)
+    return {
+        "threshold": threshold,
+        "bands": f"{index.bands}x{index.rows}",
+        "recall_above": found[above].mean() if above.any() else None,
+        "recall_all": found.mean(),
+        "false_positive_rate": false_positives / len(distinct) if distinct else 0.0,
+        "label_agreement": agree[found].mean() if found.any() else None,
+        "query_ms": query_ms,
+    }
+
+def percent(value, width):
+    """`value` as a right-aligned percentage, or "-" for an empty bucket"""
+    return f"{value*100:{width - 1}.1f}%" if value is not None else f"{'-':>{width}s}"
+
+def closest_distinct(originals, distinct):
+    """Highest estimated Jaccard between any distinct article and any indexed original"""
+    index = NearDuplicateIndex()
+    indexed = np.array([index.signature(text) for text, _ in originals])
+    return max(float((indexed == index.signature(text)).mean(axis=1).max()) for text, _ in distinct)
+
+def natural_duplicates(df, threshold, window):
+    """Articles of the dataset that reuse an earlier article's category, replayed in file order"""
+    index = NearDuplicateIndex(threshold=threshold, window=window)
+    hits = agree = 0
+    for text, category in zip(df['Article'], df['Category']):
+        signature = index.signature(text)
+        match = index.query(signature, "report")
+        if match is None:
+            index.add(signature, "report", category)
+        else:
+            hits += 1
+            agree += match[0] == category
+    return hits, agree
+
+def run_report(data_path, samples, edit_rate, thresholds, seed, min_agreement, margin):
+    print("🚀 Measuring near-duplicate detection on labelled data...")
+
+    if not os.path.exists(data_path):
+        print(f"❌ Error: Data file not found at {data_path}")
+        return
+
+    print(f"📊 Loading data from {data_path}...")
+    df = pd.read_csv(data_path).dropna(subset=['Article', 'Category'])
+    rng = np.random.default_rng(seed)
+    unique = df.drop_duplicates(subset='Article')
+    picked = unique.sample(n=min(samples * 2, len(unique)), random_state=seed)
+    half = len(picked) // 2
+    originals = list(zip(picked['Article'][:half], picked['Category'][:half]))
+    # Articles never indexed: any match for them is a false positive
+    distinct = list(zip(picked['Article'][half:], picked['Category'][half:]))
+    copies = [(syndicated_copy(text, rng, edit_rate), category) for text, category in originals]
+    true_jaccard = np.array([
+        jaccard(shingles(original, 3), shingles(copy, 3)) for (original, _), (copy, _) in zip(originals, copies)
+    ])
+
+    print(f"\nIndexed originals: {len(originals)}  Syndicated copies: {len(copies)}  Distinct articles: {len(distinct)}")
+    print(f"True Jaccard of copies: median {np.median(true_jaccard):.3f}, "
+          f"p10 {np.percentile(true_jaccard, 10):.3f}, p90 {np.percentile(true_jaccard, 90):.3f}")
+    print("\n" + "=" * 84)
+    print(f"{'threshold':>10s} {'bands':>7s} {'recall(J>=t)':>13s} {'recall(all)':>12s} "
+          f"{'false pos':>10s} {'label agree':>12s} {'query ms':>9s}")
+    print("=" * 84)
+    rows = []
+    for threshold in sorted(thresholds):
+        row = evaluate(threshold, len(originals), originals, copies, true_jaccard, distinct)
+        rows.append(row)
+        print(f"{row['threshold']:10.2f} {row['bands']:>7s} {percent(row['recall_above'], 13)} {percent(row['recall_all'], 12)} "
+              f"{row['false_positive_rate']*100:9.2f}% {percent(row['label_agreement'], 12)} {row['query_ms']:9.3f}")
+    print("=" * 84)
+
+    # Lower thresholds reuse more predictions; take the lowest that never
+    # matched a distinct article, kept the copies' categories and stays
+    # `margin` above the most similar pair of distinct articles
+    closest = closest_distinct(originals, distinct)
+    print(f"\nClosest distinct articles: estimated Jaccard {closest:.3f}")
+    safe = [
+        row for row in rows
+        if row['false_positive_rate'] == 0 and row['threshold'] >= closest + margin
+        and (row['label_agreement'] is None or row['label_agreement'] >= min_agreement)
+    ]
+    if safe:
+        best = safe[0]
+        print(f"🏆 Recommended NEAR_DUPLICATE_THRESHOLD={best['threshold']:.2f} "
+              f"({best['recall_all']*100:.1f}% of copies reused, no false matches)")
+    else:
+        print(f"⚠️ No threshold is {margin:.2f} above the closest distinct articles with "
+              f"{min_agreement*100:.1f}% label agreement and no false matches")
+
+    print("\n🔁 Near-duplicates already in the dataset (replayed in file order):")
+    for threshold in sorted(thresholds):
+        hits, agree = natural_duplicates(df, threshold, len(df))
+        agreement = f"{agree / hits * 100:.2f}% same category" if hits else "-"
+        print(f"   threshold {threshold:.2f}: {hits} of {len(df)} articles reuse a prediction ({agreement})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall and accuracy of MinHash near-duplicate reuse")
+    parser.add_argument("--data", default=DATA_PATH, help="Labelled CSV with Article and Category columns")
+    parser.add_argument("--samples", type=int, default=500, help="Articles to syndicate (as many again are used as distinct articles)")
+    parser.add_argument("--edit-rate", type=float, default=0.05, help="Share of words edited in each copy")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="Share of reused categories that must be right")
+    parser.add_argument("--margin", type=float, default=0.3,
+                        help="Minimum gap between the threshold and the closest distinct articles")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_report(args.data, args.samples, args.edit_rate, args.thresholds, args.seed, args.min_agreement, args.margin)
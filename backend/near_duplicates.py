@@ -0,0 +1,145 @@
+"""
+Near-duplicate detection with MinHash locality-sensitive hashing.
+
+Syndicated copies of an article differ only in bylines, timestamps or
+boilerplate, so they miss the exact-text prediction cache. Each text is
+reduced to its set of word shingles (runs of `shingle_size` words) and a
+MinHash signature of `num_perm` values; the share of equal signature values
+estimates the Jaccard similarity of two shingle sets. Signatures are split
+into bands and indexed by band hash, so a lookup only compares against
+documents that collide in at least one band, instead of every stored one.
+
+The index is a sliding window over the last `window` documents: older
+entries are evicted together with their band entries, bounding memory.
+"""
+import re
+import threading
+import zlib
+from collections import deque
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD_PATTERN = re.compile(r"\w+")
+
+def choose_bands(num_perm: int, threshold: float):
+    """
+    (bands, rows) with bands * rows == num_perm whose S-curve midpoint
+    (1 / bands) ** (1 / rows) is as high as possible without exceeding the
+    threshold, so pairs at the threshold are candidates with high probability
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+def shingles(text: str, size: int) -> set:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the text's shingle set (uint32, num_perm values)"""
+        hashed = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles(text, self.shingle_size)],
+                          dtype=np.uint64)
+        if hashed.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # Universal hashing a*x + b mod p for every (permutation, shingle) pair
+        permuted = (np.outer(hashed, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+class NearDuplicateIndex:
+    """
+    Recent documents' signatures and predictions. `namespace` keeps
+    predictions of different models (or label sets) apart.
+    """
+    def __init__(self, threshold: float = 0.6, window: int = 10000, num_perm: int = 128, shingle_size: int = 3):
+        self.threshold = threshold
+        self.window = window
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self.entries = {}          # doc id -> (namespace, signature, value)
+        self.order = deque()       # doc ids, oldest first
+        self.buckets = {}          # (namespace, band, band hash) -> set of doc ids
+        self.next_id = 0
+        self.counters = {"lookups": 0, "hits": 0, "candidates": 0, "inserted": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, namespace: str, signature: np.ndarray):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            yield (namespace, band, chunk.tobytes())
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(text)
+
+    def query(self, signature: np.ndarray, namespace: str):
+        """(value, estimated Jaccard) of the most similar stored document at or above the threshold, else None"""
+        with self._lock:
+            self.counters["lookups"] += 1
+            candidates = set()
+            for key in self._band_keys(namespace, signature):
+                candidates.update(self.buckets.get(key, ()))
+            self.counters["candidates"] += len(candidates)
+            best, best_similarity = None, self.threshold
+            for doc_id in candidates:
+                _, stored, value = self.entries[doc_id]
+                similarity = float(np.mean(stored == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = value, similarity
+            if best is None:
+                return None
+            self.counters["hits"] += 1
+            return best, round(best_similarity, 4)
+
+    def add(self, signature: np.ndarray, namespace: str, value):
+        with self._lock:
+            doc_id = self.next_id
+            self.next_id += 1
+            self.entries[doc_id] = (namespace, signature, value)
+            self.order.append(doc_id)
+            for key in self._band_keys(namespace, signature):
+                self.buckets.setdefault(key, set()).add(doc_id)
+            self.counters["inserted"] += 1
+            while len(self.order) > self.window:
+                self._evict(self.order.popleft())
+
+    def _evict(self, doc_id: int):
+        namespace, signature, _ = self.entries.pop(doc_id)
+        for key in self._band_keys(namespace, signature):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.buckets[key]
+        self.counters["evicted"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["lookups"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+                "documents": len(self.entries),
+                "window": self.window,
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "rows_per_band": self.rows,
+            }
@@ -0,0 +1,229 @@
+"""
+Online updates of the custom model from editor feedback.
+
+POST /feedback records (text, correct category) pairs. FeedbackLearner
+keeps a copy of the served pipeline and applies the corrections to it with
+partial_fit in micro-batches, off the request path. Every
+`holdout_every`-th correction is held out instead of learned from; a
+snapshot is published only if, on those held-out corrections, its accuracy
+is no more than `max_accuracy_drop` below the served model's and neither
+its log-loss nor its mean confidence in the top category got worse by more
+than `max_log_loss_increase` / `max_confidence_drop`. Otherwise the learner
+rolls back to the served model.
+
+Every correction is also appended to a JSONL log, so full retrains can
+fold them into the training data.
+"""
+import copy
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from linear_scorer import logistic_link
+from text_preprocessing import preprocess_texts
+
+def online_classifier(clf):
+    """
+    A writable copy of a fitted classifier that `partial_fit` can update:
+    SGD and naive Bayes models, or LogisticRegression.
+    """
+    if not hasattr(clf, "partial_fit") and type(clf).__name__ != "LogisticRegression":
+        raise ValueError(f"{type(clf).__name__} can't be updated online")
+    clf = copy.deepcopy(clf)
+    if not hasattr(clf, "partial_fit"):
+        clf.coef_ = np.array(clf.coef_, dtype=np.float64, order="C")
+        clf.intercept_ = np.array(clf.intercept_, dtype=np.float64, order="C")
+    return clf
+
+def partial_fit(clf, features, categories, learning_rate: float):
+    """
+    One update of `clf` on a micro-batch. LogisticRegression takes a
+    gradient step on its own log-loss, in place: softmax for multinomial
+    models, per-class sigmoids for one-vs-rest and binary ones. Its
+    predict_proba (and compiled scorer) keep the same calibration, so
+    thresholds tuned on the served model still apply.
+    """
+    if hasattr(clf, "partial_fit"):
+        clf.partial_fit(features, categories, classes=clf.classes_)
+        return
+    targets = (np.asarray(categories)[:, None] == np.asarray(clf.classes_).astype(str)).astype(np.float64)
+    scores = np.asarray(features @ clf.coef_.T) + clf.intercept_
+    if clf.coef_.shape[0] == 1:
+        # Binary: one sigmoid for the second class
+        targets = targets[:, 1:]
+        residuals = 1.0 / (1.0 + np.exp(-scores)) - targets
+    elif logistic_link(clf) == "softmax":
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        residuals = probabilities / probabilities.sum(axis=1, keepdims=True) - targets
+    else:
+        residuals = 1.0 / (1.0 + np.exp(-scores)) - targets
+    # Summed over the batch: each correction moves the model as one SGD step would
+    clf.coef_ -= learning_rate * np.asarray(features.T @ residuals).T
+    clf.intercept_ -= learning_rate * residuals.sum(axis=0)
+
+def log_loss(model, texts, categories) -> float:
+    probabilities = model.predict_proba(texts)
+    columns = {str(c): i for i, c in enumerate(model.classes_)}
+    true = np.array([probabilities[i, columns[c]] if c in columns else 0.0 for i, c in enumerate(categories)])
+    return float(-np.mean(np.log(np.clip(true, 1e-15, 1.0))))
+
+class FeedbackLearner:
+    """Buffers feedback and applies it to an online copy of the custom model"""
+    def __init__(self, log_path: str, batch_size: int = 32, holdout_every: int = 5,
+                 holdout_size: int = 500, min_holdout: int = 20, max_accuracy_drop: float = 0.01,
+                 max_log_loss_increase: float = 0.02, max_confidence_drop: float = 0.02,
+                 learning_rate: float = 0.05):
+        self.log_path = log_path
+        self.batch_size = batch_size
+        self.holdout_every = holdout_every
+        self.min_holdout = min_holdout
+        self.max_accuracy_drop = max_accuracy_drop
+        self.max_log_loss_increase = max_log_loss_increase
+        self.max_confidence_drop = max_confidence_drop
+        self.learning_rate = learning_rate
+        self.pending = []                          # not applied yet
+        self.applied = []                          # applied since the last snapshot
+        self.holdout = deque(maxlen=holdout_size)  # (text, category) never learned from
+        self.pipeline = None
+        self.base_version = None
+        self.received = 0
+        self.stats = {"applied": 0, "batches": 0, "snapshots": 0, "rollbacks": 0,
+                      "last_holdout_accuracy": None, "last_served_accuracy": None,
+                      "last_holdout_log_loss": None, "last_served_log_loss": None,
+                      "last_holdout_confidence": None, "last_served_confidence": None, "last_decision": None}
+        self._lock = threading.Lock()
+        self._load_holdout()
+
+    def _load_holdout(self):
+        """Rebuild the held-out set from the feedback log after a restart"""
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("holdout"):
+                    self.holdout.append((record["text"], record["category"]))
+
+    def add(self, text: str, category: str) -> bool:
+        """Record one correction; returns True if it was held out"""
+        with self._lock:
+            self.received += 1
+            holdout = self.holdout_every > 0 and self.received % self.holdout_every == 0
+            if holdout:
+                self.holdout.append((text, category))
+            else:
+                self.pending.append((text, category))
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "text": text,
+                    "category": category,
+                    "holdout": holdout,
+                    "received_at": datetime.now().isoformat(timespec="seconds"),
+                }) + "\n")
+        return holdout
+
+    def rebase(self, pipeline, version: str, keep_applied: bool = True):
+        """
+        Continue learning from `pipeline` (a freshly loaded copy of the served
+        version). Corrections applied since the last snapshot are queued
+        again unless `keep_applied` is False (a rollback drops them).
+        """
+        steps = list(pipeline.steps)
+        steps[-1] = (steps[-1][0], online_classifier(steps[-1][1]))
+        pipeline.steps = steps
+        with self._lock:
+            if keep_applied:
+                self.pending = self.applied + self.pending
+            else:
+                self.stats["rollbacks"] += 1
+            self.applied = []
+            self.pipeline, self.base_version = pipeline, version
+
+    def update(self) -> int:
+        """Apply pending corrections in micro-batches; returns how many were applied"""
+        applied = 0
+        while True:
+            with self._lock:
+                batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+            if not batch:
+                return applied
+            texts, categories = zip(*batch)
+            try:
+                features = self.pipeline[:-1].transform(preprocess_texts(list(texts)))
+                partial_fit(self.pipeline.steps[-1][1], features, np.array(categories), self.learning_rate)
+            except Exception:
+                # Keep the batch for the next attempt
+                with self._lock:
+                    self.pending = batch + self.pending
+                raise
+            with self._lock:
+                self.applied.extend(batch)
+                self.stats["applied"] += len(batch)
+                self.stats["batches"] += 1
+            applied += len(batch)
+
+    def holdout_items(self) -> list:
+        with self._lock:
+            return list(self.holdout)
+
+    def evaluate(self, model) -> dict:
+        """Accuracy, log-loss and mean top-category confidence on the held-out corrections"""
+        texts, categories = zip(*self.holdout_items())
+        texts = preprocess_texts(list(texts))
+        probabilities = model.predict_proba(texts)
+        predictions = np.asarray(model.classes_).astype(str)[probabilities.argmax(axis=1)]
+        return {
+            "accuracy": float(np.mean(predictions == np.array(categories))),
+            "log_loss": log_loss(model, texts, categories),
+            "confidence": float(probabilities.max(axis=1).mean()),
+        }
+
+    def check_snapshot(self, served_model):
+        """
+        Compare the online model with `served_model` on the held-out
+        corrections. Returns "publish", "rollback" or "wait" (nothing new
+        or too few held-out corrections to judge yet).
+        """
+        if not self.applied or len(self.holdout) < self.min_holdout:
+            return "wait"
+        candidate, served = self.evaluate(self.pipeline), self.evaluate(served_model)
+        acceptable = (
+            candidate["accuracy"] >= served["accuracy"] - self.max_accuracy_drop
+            and candidate["log_loss"] <= served["log_loss"] + self.max_log_loss_increase
+            and candidate["confidence"] >= served["confidence"] - self.max_confidence_drop
+        )
+        decision = "publish" if acceptable else "rollback"
+        with self._lock:
+            for name in ("accuracy", "log_loss", "confidence"):
+                self.stats[f"last_holdout_{name}"] = round(candidate[name], 4)
+                self.stats[f"last_served_{name}"] = round(served[name], 4)
+            self.stats["last_decision"] = decision
+        return decision
+
+    def snapshot(self):
+        """Copy of the online pipeline to publish, and how many corrections it adds"""
+        with self._lock:
+            return copy.deepcopy(self.pipeline), len(self.applied)
+
+    def mark_published(self, version: str):
+        with self._lock:
+            self.applied = []
+            self.base_version = version
+            self.stats["snapshots"] += 1
+
+    def snapshot_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "received": self.received,
+                "pending": len(self.pending),
+                "applied_since_snapshot": len(self.applied),
+                "holdout": len(self.holdout),
+                "base_version": self.base_version,
+            }
@@ -0,0 +1,169 @@
+"""
+Content-addressed prediction cache with request coalescing.
+
+Entries are keyed on a hash of the normalized text, the model id and the
+candidate label set. A bounded in-memory LRU with TTL sits in front of an
+optional SQLite tier so hot entries survive restarts. Each model id carries
+a fingerprint of the loaded weights; when it changes, that model's entries
+are dropped from both tiers.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_for_cache(text: str) -> str:
+    """Collapse whitespace and Unicode variants that don't change the prediction"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+def cache_key(text: str, model_id: str, labels=()) -> str:
+    payload = "\x1f".join([model_id, "\x1e".join(labels), normalize_for_cache(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def file_fingerprint(path: str) -> str:
+    """Content hash of a model artifact (empty string if it doesn't exist)"""
+    if not os.path.exists(path):
+        return ""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400, db_path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.db_path = db_path
+        self._entries = OrderedDict()  # key -> (model_id, expires_at, value)
+        self._fingerprints = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+        self._db = None
+        if db_path:
+            self._connect()
+            # SQLite connections must not be shared across fork(); workers
+            # forked from a preloading master open their own
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, model_id TEXT, fingerprint TEXT, expires_at REAL, value TEXT)"
+        )
+        self._db.commit()
+
+    def set_fingerprint(self, model_id: str, fingerprint: str):
+        """
+        Record the fingerprint of the currently loaded model. Entries cached
+        under a different fingerprint for this model are invalidated.
+        """
+        with self._lock:
+            if self._fingerprints.get(model_id) == fingerprint:
+                return
+            self._fingerprints[model_id] = fingerprint
+            stale = [k for k, (m, _, _) in self._entries.items() if m == model_id]
+            for key in stale:
+                del self._entries[key]
+            if self._db is not None:
+                self._db.execute(
+                    "DELETE FROM predictions WHERE model_id = ? AND fingerprint != ?",
+                    (model_id, fingerprint)
+                )
+                self._db.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[2]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT model_id, fingerprint, expires_at, value FROM predictions WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None:
+                    model_id, fingerprint, expires_at, value = row
+                    if expires_at > now and self._fingerprints.get(model_id, "") == fingerprint:
+                        value = json.loads(value)
+                        self._store(key, model_id, expires_at, value)
+                        self.counters["disk_hits"] += 1
+                        return value
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key: str, model_id: str, value: dict):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, model_id, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    (key, model_id, self._fingerprints.get(model_id, ""), expires_at, json.dumps(value))
+                )
+                self._db.commit()
+
+    def _store(self, key, model_id, expires_at, value):
+        self._entries[key] = (model_id, expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    async def get_or_compute(self, key: str, model_id: str, compute):
+        """
+        Return the cached value for `key`, or await `compute()` to produce it.
+        Concurrent callers asking for the same key share one computation.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        # The computation runs as its own task so that a disconnecting
+        # caller doesn't cancel it for the others waiting on the same key
+        task = self._inflight.get(key)
+        if task is not None:
+            with self._lock:
+                self.counters["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, model_id, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, model_id: str, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, model_id, task.result())
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = self.counters["hits"] + self.counters["disk_hits"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "inflight": len(self._inflight),
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "disk_tier": self.db_path is not None,
+            }
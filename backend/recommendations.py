@@ -0,0 +1,256 @@
+"""
+Content-based article recommendations.
+
+Articles are embedded with the custom model's TF-IDF vectorizer (so no
+second text model is trained or loaded) and kept as L2-normalized sparse
+rows, one block per category. A user's profile is a decayed sum of the
+rows of the articles they read, updated on every history event. A query
+scores only the blocks of the user's most-read categories (or the one
+asked for) with a sparse matrix-vector product and keeps the top k.
+
+Once a block holds `approx_min_articles` rows the query switches to an
+approximate search: only the profile's `profile_terms` heaviest terms are
+scored, through a column-major copy of the block, so the work depends on
+how many articles contain those terms rather than on the whole block.
+
+Results are cached per user until the user reads something new or the
+index changes.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from text_preprocessing import preprocess_texts
+
+def normalize_rows(matrix) -> sparse.csr_matrix:
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix, dtype=np.float32)
+
+def embed_texts(model, texts) -> sparse.csr_matrix:
+    """Normalized TF-IDF rows of `texts` from the custom model's vectorizer"""
+    cleaned = preprocess_texts(texts)
+    steps = getattr(model, "steps", None)
+    if steps:
+        features = cleaned
+        for _, step in steps[:-1]:
+            features = step.transform(features)
+        return normalize_rows(features)
+    # Compiled scorer (linear_scorer.py): the same TF-IDF weights, in its column order
+    rows = [model.features(text) for text in cleaned]
+    indptr = np.cumsum([0] + [len(columns) for columns, _ in rows])
+    indices = np.concatenate([columns for columns, _ in rows]) if rows else np.empty(0, dtype=np.intp)
+    data = np.concatenate([weights for _, weights in rows]) if rows else np.empty(0)
+    return normalize_rows(sparse.csr_matrix((data, indices, indptr), shape=(len(rows), len(model.vocabulary))))
+
+class CategoryBlock:
+    """Article ids and normalized rows of one category"""
+    def __init__(self, ids, matrix, approximate: bool):
+        self.ids = ids
+        self.matrix = matrix
+        self.columns = matrix.tocsc() if approximate else None
+
+    def scores(self, profile: np.ndarray, terms: np.ndarray) -> np.ndarray:
+        if self.columns is None:
+            return self.matrix @ profile
+        return self.columns[:, terms] @ profile[terms]
+
+class ArticleIndex:
+    """Immutable snapshot of the embedded catalog; updates build a new one"""
+    def __init__(self, version: str, rows: dict, n_features: int, approx_min_articles: int,
+                 generation: int = 0, previous: "ArticleIndex" = None):
+        self.version = version
+        self.rows = rows  # category -> (ids, matrix)
+        self.n_features = n_features
+        self.approx_min_articles = approx_min_articles
+        self.generation = generation
+        # Categories that didn't change keep their block (and its column-major copy)
+        unchanged = previous.blocks if previous is not None else {}
+        self.blocks = {
+            category: unchanged[category] if category in unchanged and unchanged[category].ids is ids
+            else CategoryBlock(ids, matrix, len(ids) >= approx_min_articles)
+            for category, (ids, matrix) in rows.items()
+        }
+        self.positions = {
+            int(article_id): (category, i)
+            for category, (ids, _) in rows.items() for i, article_id in enumerate(ids)
+        }
+
+    @classmethod
+    def build(cls, model, version: str, batches, approx_min_articles: int) -> "ArticleIndex":
+        """Embed every (id, category, title, content) row from `batches`"""
+        index = cls(version, {}, 0, approx_min_articles)
+        for batch in batches:
+            index = index.with_articles(model, batch)
+        return index
+
+    def with_articles(self, model, articles) -> "ArticleIndex":
+        """A new index that also holds `articles` ((id, category, title, content) tuples)"""
+        if not articles:
+            return self
+        matrix = embed_texts(model, [f"{title}. {content}" for _, _, title, content in articles])
+        categories = np.array([category.lower() for _, category, _, _ in articles])
+        ids = np.array([article_id for article_id, _, _, _ in articles], dtype=np.int64)
+        rows = dict(self.rows)
+        for category in np.unique(categories):
+            mask = categories == category
+            if category in rows:
+                old_ids, old_matrix = rows[category]
+                rows[category] = (np.concatenate([old_ids, ids[mask]]), sparse.vstack([old_matrix, matrix[mask]], format="csr"))
+            else:
+                rows[category] = (ids[mask], matrix[mask])
+        return ArticleIndex(self.version, rows, matrix.shape[1], self.approx_min_articles, self.generation + 1, self)
+
+    def vectors(self, article_ids) -> list:
+        """Rows of the given articles (ids not in the index are skipped)"""
+        found = []
+        for article_id in article_ids:
+            position = self.positions.get(int(article_id))
+            if position is not None:
+                category, i = position
+                found.append((category, self.rows[category][1][i]))
+        return found
+
+    def size(self) -> int:
+        return len(self.positions)
+
+class UserProfile:
+    """Decayed sum of the rows of the articles a user read (sparse, 1 x n_features)"""
+    def __init__(self, n_features: int):
+        self.vector = sparse.csr_matrix((1, n_features), dtype=np.float32)
+        self.read = set()
+        self.categories = {}
+
+class Recommender:
+    def __init__(self, store, top_categories: int = 2, profile_terms: int = 64, decay: float = 0.95,
+                 approx_min_articles: int = 20000, history_limit: int = 200, cache_users: int = 10000):
+        self.store = store
+        self.top_categories = top_categories
+        self.profile_terms = profile_terms
+        self.decay = decay
+        self.approx_min_articles = approx_min_articles
+        self.history_limit = history_limit
+        self.cache_users = cache_users
+        self.index = None
+        self.profiles = {}
+        self.cache = OrderedDict()  # user_id -> {(k, category, generation): results}
+        self.counters = {"queries": 0, "cache_hits": 0, "rebuilds": 0}
+        self._lock = threading.Lock()
+
+    # --- Index (built off the event loop, swapped in with use_index) ---
+    def build_index(self, model, version: str) -> ArticleIndex:
+        return ArticleIndex.build(model, version, self.store.iter_articles(), self.approx_min_articles)
+
+    def use_index(self, index: ArticleIndex):
+        with self._lock:
+            if self.index is None or (index.version, index.n_features) != (self.index.version, self.index.n_features):
+                # A new embedding space: profiles are rebuilt from history on demand
+                self.profiles.clear()
+                self.counters["rebuilds"] += 1
+            self.index = index
+            self.cache.clear()
+
+    # --- Profiles ---
+    def _add_reads(self, profile: UserProfile, article_ids):
+        for category, row in self.index.vectors(article_ids):
+            profile.vector = profile.vector * self.decay + row
+            profile.categories[category] = profile.categories.get(category, 0) + 1
+        profile.read.update(int(article_id) for article_id in article_ids)
+
+    def _profile(self, user_id: str) -> UserProfile:
+        profile = self.profiles.get(user_id)
+        if profile is None:
+            profile = UserProfile(self.index.n_features)
+            self._add_reads(profile, self.store.history(user_id, self.history_limit))
+            self.profiles[user_id] = profile
+        return profile
+
+    def record_reads(self, user_id: str, article_ids) -> list:
+        """Store reads in the history, update the profile and drop the user's cached results"""
+        known = self.store.add_reads(user_id, article_ids)
+        with self._lock:
+            if self.index is not None:
+                if user_id in self.profiles:
+                    self._add_reads(self.profiles[user_id], known)
+                else:
+                    self._profile(user_id)
+            self.cache.pop(user_id, None)
+        return known
+
+    # --- Queries ---
+    def recommend(self, user_id: str, k: int = 10, category: str = None) -> list:
+        """Top `k` unread (article_id, score) pairs for the user; [] without history"""
+        with self._lock:
+            self.counters["queries"] += 1
+            index = self.index
+            key = (k, category.lower() if category else None, index.generation)
+            cached = self.cache.get(user_id, {}).get(key)
+            if cached is not None:
+                self.counters["cache_hits"] += 1
+                self.cache.move_to_end(user_id)
+                return cached
+            profile = self._profile(user_id)
+            results = self._search(index, profile, k, key[1])
+            self.cache.setdefault(user_id, {})[key] = results
+            self.cache.move_to_end(user_id)
+            while len(self.cache) > self.cache_users:
+                self.cache.popitem(last=False)
+            return results
+
+    def read_articles(self, user_id: str) -> set:
+        """Ids of the articles the user read (the last `history_limit` of them)"""
+        with self._lock:
+            return set(self._profile(user_id).read)
+
+    def _search(self, index: ArticleIndex, profile: UserProfile, k: int, category: str) -> list:
+        if not profile.categories or index.size() == 0:
+            return []
+        if category:
+            categories = [category]
+        else:
+            # Pre-filter to the user's most-read categories, widening to all
+            # of them if those can't fill k unread articles
+            ranked = sorted(profile.categories, key=profile.categories.get, reverse=True)
+            categories = ranked[:self.top_categories]
+            available = sum(len(index.blocks[c].ids) for c in categories if c in index.blocks)
+            if available - len(profile.read) < k:
+                categories = list(index.blocks)
+        vector = profile.vector.toarray().ravel()
+        # Heaviest profile terms, for the approximate (column-pruned) blocks
+        top = np.argsort(-profile.vector.data)[:self.profile_terms]
+        terms = profile.vector.indices[top]
+
+        candidate_ids, candidate_scores = [], []
+        for category in categories:
+            block = index.blocks.get(category)
+            if block is None:
+                continue
+            scores = block.scores(vector, terms)
+            unread = ~np.isin(block.ids, list(profile.read))
+            ids, scores = block.ids[unread], scores[unread]
+            if len(ids) > k:
+                top = np.argpartition(scores, -k)[-k:]
+                ids, scores = ids[top], scores[top]
+            candidate_ids.append(ids)
+            candidate_scores.append(scores)
+        if not candidate_ids:
+            return []
+        ids, scores = np.concatenate(candidate_ids), np.concatenate(candidate_scores)
+        norm = float(np.linalg.norm(profile.vector.data)) or 1.0
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(int(ids[i]), round(float(scores[i]) / norm, 4)) for i in order if scores[i] > 0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            index = self.index
+            return {
+                **self.counters,
+                "model_version": index.version if index else None,
+                "articles": index.size() if index else 0,
+                "approximate_categories": sorted(c for c, b in index.blocks.items() if b.columns is not None) if index else [],
+                "profiles": len(self.profiles),
+                "cached_users": len(self.cache),
+            }
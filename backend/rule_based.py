@@ -0,0 +1,118 @@
+"""
+Simple Rule-Based Classifier (No AI Model Required)
+
+Keywords and their weights are loaded from rule_keywords.json (or the
+file named by RULE_KEYWORDS_PATH) once at import. Each text is then
+tokenized in a single pass and its words are looked up in one table that
+covers every category, so the cost grows with the text, not with the
+number of keywords.
+"""
+import hashlib
+import json
+import os
+import string
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+KEYWORDS_PATH = os.getenv("RULE_KEYWORDS_PATH", os.path.join(BASE_DIR, "rule_keywords.json"))
+
+# Punctuation becomes a word separator ("apple's" -> "apple s")
+SEPARATORS = str.maketrans({c: " " for c in string.punctuation + "\u2018\u2019\u201c\u201d\u2013\u2014"})
+
+class KeywordMatcher:
+    """
+    Weighted keyword rules matched on whole words.
+
+    A keyword only matches as a whole word or phrase, so 'ai' no longer
+    fires inside 'said' nor 'win' inside 'window'. Every distinct keyword
+    found adds its weight to its category's score.
+    """
+    def __init__(self, keywords: dict):
+        self.categories = list(keywords)
+        self.weights = {}
+        self.forms = {}
+        self.phrases = {}
+        for category, category_keywords in keywords.items():
+            for keyword, weight in category_keywords.items():
+                keyword = " ".join(keyword.lower().translate(SEPARATORS).split())
+                if not keyword:
+                    raise ValueError(f"Empty keyword in category '{category}'")
+                if keyword in self.weights:
+                    raise ValueError(f"Keyword '{keyword}' is listed in more than one category")
+                self.weights[keyword] = (category, float(weight))
+                if " " in keyword:
+                    # Phrases are looked up only when their first word occurs
+                    self.phrases.setdefault(keyword.split()[0], []).append((f" {keyword} ", keyword))
+                else:
+                    self.forms[keyword] = keyword
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def matches(self, text: str) -> set:
+        """Distinct keywords occurring in `text`"""
+        tokens = text.lower().translate(SEPARATORS).split()
+        words = set(tokens)
+        found = {self.forms[word] for word in words & self.forms.keys()}
+        if self.phrases:
+            joined = None
+            for first_word in words & self.phrases.keys():
+                joined = joined or f" {' '.join(tokens)} "
+                found.update(keyword for form, keyword in self.phrases[first_word] if form in joined)
+        return found
+
+    def scores(self, text: str) -> dict:
+        scores = dict.fromkeys(self.categories, 0)
+        for keyword in self.matches(text):
+            category, weight = self.weights[keyword]
+            scores[category] += weight
+        return scores
+
+    def scores_batch(self, texts) -> list:
+        return [self.scores(text) for text in texts]
+
+def _rules_version(path: str) -> str:
+    with open(path, "rb") as f:
+        return "keywords-" + hashlib.sha256(f.read()).hexdigest()[:8]
+
+matcher = KeywordMatcher.from_file(KEYWORDS_PATH)
+RULES_VERSION = _rules_version(KEYWORDS_PATH)
+
+def keyword_scores(text: str) -> dict:
+    """
+    Weighted keyword matches per category
+    """
+    return matcher.scores(text)
+
+def scores_to_prediction(scores: dict) -> dict:
+    # Get category with highest score
+    category = max(scores, key=scores.get)
+    max_score = scores[category]
+    
+    # Calculate confidence (0.6 to 0.95 range)
+    if max_score == 0:
+        category = "Technology"  # Default
+        confidence = 0.65
+    else:
+        total_keywords = sum(scores.values())
+        confidence = min(0.95, 0.60 + (max_score / max(total_keywords, 1)) * 0.35)
+    
+    return {
+        "category": category,
+        "confidence": confidence,
+        "model_used": "Rule-Based Classifier (Render Optimized)"
+    }
+
+def classify_text_simple(text: str) -> dict:
+    """
+    Simple keyword-based classifier for demo purposes.
+    Uses no AI model to save memory on Render free tier.
+    """
+    return scores_to_prediction(matcher.scores(text))
+
+def classify_texts_simple(texts) -> list:
+    """
+    Batch version of classify_text_simple
+    """
+    return [scores_to_prediction(scores) for scores in matcher.scores_batch(texts)]
@@ -0,0 +1,104 @@
+from sklearn.pipeline import Pipeline
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from linear_scorer import LinearScorer, compile_pipeline, save_scorer
+from text_preprocessing import preprocess_texts
+import numpy as np
+import os
+import sys
+import tempfile
+
+TOLERANCE = 1e-4
+
+TRAIN = [
+    ("Apple releases new iPhone with advanced AI chip and faster software", "Technology"),
+    ("Google unveils cloud computing platform for internet startups", "Technology"),
+    ("Microsoft buys software company to expand its phone business", "Technology"),
+    ("Stock market hits record high as inflation cools down", "Business"),
+    ("Bank profits rise as shares of oil companies climb", "Business"),
+    ("The company reported strong quarterly profit and sales growth", "Business"),
+    ("The Lakers won the championship game last night", "Sports"),
+    ("Football club signs striker ahead of the league final", "Sports"),
+    ("Tennis star wins the open after a five set match", "Sports"),
+    ("New movie breaks box office records opening weekend", "Entertainment"),
+    ("The actor won an award for best film at the festival", "Entertainment"),
+    ("Pop singer releases new album and announces world tour", "Entertainment"),
+    ("Senate passes new bill regarding healthcare reform", "Politics"),
+    ("The prime minister called an early election vote", "Politics"),
+    ("Government ministers debate the new tax policy in parliament", "Politics"),
+]
+
+TEST_TEXTS = [
+    "Apple's new phone chip beats Google in the internet market",
+    "Shares fall as the bank reports lower profit",
+    "The striker scored twice in the league final match match match",
+    "Film festival award for the singer's new movie album",
+    "Parliament votes on the minister's healthcare bill",
+    "Zyxxq plorf wibble",  # no known words
+    "",
+]
+
+def pipelines():
+    """(name, unfitted pipeline) for every estimator and vectorizer setting the scorer compiles"""
+    return [
+        ("LogisticRegression (softmax)", Pipeline([("tfidf", TfidfVectorizer()), ("clf", LogisticRegression(max_iter=1000))])),
+        ("LogisticRegression (liblinear, one-vs-rest)", Pipeline([
+            ("tfidf", TfidfVectorizer()), ("clf", LogisticRegression(solver="liblinear"))
+        ])),
+        ("LogisticRegression (bigrams, sublinear_tf, stop words)", Pipeline([
+            ("tfidf", TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, stop_words="english")),
+            ("clf", LogisticRegression(max_iter=1000)),
+        ])),
+        ("LogisticRegression (binary, no idf, l1 norm)", Pipeline([
+            ("tfidf", TfidfVectorizer(binary=True, use_idf=False, norm="l1")), ("clf", LogisticRegression(max_iter=1000))
+        ])),
+        ("MultinomialNB", Pipeline([("tfidf", TfidfVectorizer()), ("clf", MultinomialNB(alpha=0.1))])),
+        ("SGDClassifier (log_loss)", Pipeline([
+            ("tfidf", TfidfVectorizer()), ("clf", SGDClassifier(loss="log_loss", random_state=42))
+        ])),
+        ("LogisticRegression (two classes)", Pipeline([("tfidf", TfidfVectorizer()), ("clf", LogisticRegression())])),
+    ]
+
+def test_parity():
+    print("🚀 Checking compiled scorers against their sklearn pipelines...\n")
+    texts, labels = zip(*TRAIN)
+    texts = preprocess_texts(list(texts))
+    test_texts = preprocess_texts(TEST_TEXTS)
+    failures = 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, pipeline in pipelines():
+            try:
+                if "two classes" in name:
+                    keep = [i for i, label in enumerate(labels) if label in ("Sports", "Politics")]
+                    pipeline.fit([texts[i] for i in keep], [labels[i] for i in keep])
+                else:
+                    pipeline.fit(texts, labels)
+            except ValueError as e:
+                # e.g. multi-class liblinear was removed in newer scikit-learn
+                print(f"⏭️ {name}: skipped ({e})")
+                continue
+
+            # Round-trip through the .npz file, as the API loads it
+            path = os.path.join(tmp_dir, "scorer.npz")
+            save_scorer(compile_pipeline(pipeline), path)
+            scorer = LinearScorer.load(path)
+
+            expected = pipeline.predict_proba(test_texts)
+            max_diff = float(np.abs(expected - scorer.predict_proba(test_texts)).max())
+            same_classes = list(scorer.classes_) == [str(c) for c in pipeline.classes_]
+            same_predictions = list(scorer.predict(test_texts)) == [str(c) for c in pipeline.predict(test_texts)]
+            passed = max_diff <= TOLERANCE and same_classes and same_predictions
+            failures += not passed
+            print(f"{'✅' if passed else '❌'} {name}: max difference {max_diff:.2e}"
+                  f"{'' if same_predictions else ', predictions differ'}{'' if same_classes else ', classes differ'}")
+
+    print("-" * 50)
+    if failures:
+        print(f"❌ {failures} pipeline(s) out of parity (tolerance {TOLERANCE})")
+        sys.exit(1)
+    print(f"✅ All scorers match their pipelines within {TOLERANCE}")
+
+if __name__ == "__main__":
+    test_parity()
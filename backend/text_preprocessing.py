@@ -0,0 +1,36 @@
+"""
+Shared text normalization used by both model training and serving.
+
+Keeping a single implementation guarantees the custom model sees the
+same cleaned text at inference time as it did during training.
+"""
+import re
+import string
+
+# Compiled once at import instead of on every call
+BRACKETS_PATTERN = re.compile(r'\[.*?\]')
+DIGIT_WORDS_PATTERN = re.compile(r'\w*\d\w*')
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+def preprocess_text(text):
+    """
+    Basic text cleaning: lowercase, drop [bracketed] spans, strip
+    punctuation and remove words containing digits
+    """
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = BRACKETS_PATTERN.sub('', text)
+    text = text.translate(PUNCTUATION_TABLE)
+    text = DIGIT_WORDS_PATTERN.sub('', text)
+    return text
+
+def preprocess_texts(texts):
+    """
+    Batch version of preprocess_text.
+    A pandas Series comes back as a Series with the same index; any other
+    iterable comes back as a list.
+    """
+    if hasattr(texts, 'map') and hasattr(texts, 'index'):
+        return texts.map(preprocess_text)
+    return [preprocess_text(text) for text in texts]
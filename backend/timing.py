@@ -0,0 +1,116 @@
+"""
+Per-request stage timings.
+
+The HTTP middleware starts a RequestTimer for every request; handlers wrap
+their stages in `span(...)`. The stages come back in the Server-Timing
+response header and slow requests are logged with their breakdown.
+"""
+import cProfile
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Requests slower than this are written to slow_requests.log (0 disables)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+# Profile one in every N requests with cProfile (0 disables)
+PROFILE_EVERY_N = int(os.getenv("PROFILE_EVERY_N", "0"))
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "profiles")
+
+class RequestTimer:
+    """Durations of the named stages of one request"""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []
+        self.info = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages.append((name, seconds))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def breakdown(self) -> dict:
+        """Milliseconds per stage (repeated stages are summed)"""
+        durations = {}
+        for name, seconds in self.stages:
+            durations[name] = durations.get(name, 0.0) + seconds * 1000
+        return {name: round(ms, 2) for name, ms in durations.items()}
+
+    def server_timing(self, total_seconds: float) -> str:
+        entries = [f"{name};dur={ms:.2f}" for name, ms in self.breakdown().items()]
+        entries.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(entries)
+
+_current = ContextVar("request_timer", default=None)
+
+def start_timer() -> RequestTimer:
+    timer = RequestTimer()
+    _current.set(timer)
+    return timer
+
+def current_timer():
+    return _current.get()
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as stage `name` of the current request"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+def add_stage(name: str, seconds: float):
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+def mark_handler_start():
+    """Record routing, body reading and pydantic validation as the 'parse' stage"""
+    timer = _current.get()
+    if timer is not None:
+        timer.add("parse", timer.elapsed())
+
+def set_info(**info):
+    """Attach details (e.g. input_length) to the slow-request log entry"""
+    timer = _current.get()
+    if timer is not None:
+        timer.info.update(info)
+
+class Sampler:
+    """Chooses one in every `every_n` requests for profiling"""
+    def __init__(self, every_n: int):
+        self.every_n = every_n
+        self.count = 0
+        self.active = False
+
+    def start(self):
+        """A started profiler if this request is sampled, else None"""
+        if self.every_n <= 0 or self.active:
+            return None
+        self.count += 1
+        if self.count % self.every_n:
+            return None
+        # cProfile sees the whole event loop thread, so only one at a time
+        self.active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def stop(self, profiler, endpoint: str) -> str:
+        """Stop `profiler` and return where its stats should be saved"""
+        profiler.disable()
+        self.active = False
+        name = endpoint.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        return os.path.join(PROFILES_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.count}-{name}.prof")
+
+def dump_profile(profiler, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler.dump_stats(path)
+
+profile_sampler = Sampler(PROFILE_EVERY_N)
@@ -1,9 +1,13 @@
 import pandas as pd
 import numpy as np
-import re
-import string
+import argparse
 import joblib
-from sklearn.model_selection import train_test_split
+import time
+from joblib import Parallel, delayed
+from feature_store import load_features
+from linear_scorer import export_scorer
+from model_registry import data_hash, publish_model
+from text_preprocessing import preprocess_texts
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.naive_bayes import MultinomialNB
@@ -18,18 +22,19 @@ from datetime import datetime
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(BASE_DIR, "flipitnews-data.csv")
 RESULTS_FILE = os.path.join(BASE_DIR, "model_training_results.txt")
+# TF-IDF configuration shared by every candidate; part of the feature store key
+VECTORIZER_PARAMS = {"max_features": 5000, "stop_words": "english"}
+# Articles the compiled scorer is checked against after training
+PARITY_SAMPLES = 500
 
-def preprocess_text(text):
-    """Basic text cleaning"""
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'[%s]' % re.escape(string.punctuation), '', text)
-    text = re.sub(r'\w*\d\w*', '', text)
-    return text
+def fit_and_evaluate(model_name, estimator, X_train, y_train, X_test):
+    """Fit one candidate on the shared TF-IDF features; returns its test predictions and fit time"""
+    start = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    return model_name, estimator, estimator.predict(X_test), train_seconds
 
-def train_and_evaluate_all_models():
+def train_and_evaluate_all_models(workers=None, use_feature_cache=True):
     results = []
     results.append("=" * 80)
     results.append(f"MODEL TRAINING & EVALUATION REPORT")
@@ -42,68 +47,69 @@ def train_and_evaluate_all_models():
         print(f"❌ Error: Data file not found at {DATA_PATH}")
         return
     
-    print(f"📊 Loading data from {DATA_PATH}...")
+    # 2-4. Preprocess, split and vectorize once; every candidate trains on
+    # the same sparse matrices (loaded from the feature store when the data,
+    # preprocessing and TF-IDF settings are unchanged)
+    print(f"📊 Loading features for {DATA_PATH}...")
+    features = load_features(DATA_PATH, TfidfVectorizer, VECTORIZER_PARAMS, test_size=0.2,
+                             random_state=42, stratify=True, use_cache=use_feature_cache)
+    print("⚡ Loaded cached features" if features.cache_hit else "🧹 Preprocessed and vectorized text")
+    vectorizer = features.vectorizer
+    X_train_tfidf, X_test_tfidf = features.X_train, features.X_test
+    y_train, y_test = features.y_train, features.y_test
+    
+    categories = pd.Series(np.concatenate([y_train, y_test]))
     results.append(f"📊 Dataset: {DATA_PATH}")
-    df = pd.read_csv(DATA_PATH)
-    results.append(f"Total samples: {len(df)}")
-    results.append(f"Categories: {df['Category'].unique().tolist()}")
-    results.append(f"Category distribution:\n{df['Category'].value_counts()}")
+    results.append(f"Total samples: {len(categories)}")
+    results.append(f"Categories: {categories.unique().tolist()}")
+    results.append(f"Category distribution:\n{categories.value_counts()}")
+    results.append(f"Feature store key: {features.key}{' (cached)' if features.cache_hit else ''}")
     results.append("")
-    
-    # 2. Preprocess
-    print("🧹 Preprocessing text...")
-    df['cleaned_text'] = df['Article'].apply(preprocess_text)
-    
-    X = df['cleaned_text']
-    y = df['Category']
-    
-    # 3. Split Data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    results.append(f"Train samples: {len(X_train)}")
-    results.append(f"Test samples: {len(X_test)}")
+    results.append(f"Train samples: {len(y_train)}")
+    results.append(f"Test samples: {len(y_test)}")
     results.append("")
     results.append("=" * 80)
     
-    # 4. Define Models
+    # 5. Define Models
     models = {
-        "Logistic Regression": Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
-            ('clf', LogisticRegression(n_jobs=-1, max_iter=1000, random_state=42))
-        ]),
-        "Naive Bayes": Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
-            ('clf', MultinomialNB())
-        ]),
-        "Random Forest": Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
-            ('clf', RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1))
-        ]),
-        "Linear SVM": Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
-            ('clf', LinearSVC(random_state=42, max_iter=1000))
-        ])
+        "Logistic Regression": LogisticRegression(n_jobs=-1, max_iter=1000, random_state=42),
+        "Naive Bayes": MultinomialNB(),
+        "Random Forest": RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1),
+        "Linear SVM": LinearSVC(random_state=42, max_iter=1000)
     }
     
+    workers = min(workers or os.cpu_count() or 1, len(models))
+    if workers > 1:
+        # Split the cores between the models training side by side
+        inner_jobs = max(1, (os.cpu_count() or 1) // workers)
+        for estimator in models.values():
+            if 'n_jobs' in estimator.get_params():
+                estimator.set_params(n_jobs=inner_jobs)
+    
+    # 6. Train and Evaluate the models in parallel
+    print(f"🧠 Training {len(models)} models on {workers} worker(s)...")
+    start = time.perf_counter()
+    outcomes = Parallel(n_jobs=workers, prefer="threads")(
+        delayed(fit_and_evaluate)(model_name, estimator, X_train_tfidf, y_train, X_test_tfidf)
+        for model_name, estimator in models.items()
+    )
+    total_seconds = time.perf_counter() - start
+    
     best_model = None
     best_accuracy = 0
     best_model_name = ""
+    summary = []
     
-    # 5. Train and Evaluate Each Model
-    for model_name, pipeline in models.items():
-        print(f"\n🧠 Training {model_name}...")
+    for model_name, estimator, y_pred, train_seconds in outcomes:
         results.append(f"\n{'=' * 80}")
         results.append(f"MODEL: {model_name}")
         results.append(f"{'=' * 80}")
         
-        # Train
-        pipeline.fit(X_train, y_train)
-        
-        # Predict
-        y_pred = pipeline.predict(X_test)
-        
         # Evaluate
         accuracy = accuracy_score(y_test, y_pred)
+        summary.append((model_name, accuracy, train_seconds))
         results.append(f"\n🏆 Accuracy: {accuracy:.4f} ({accuracy*100:.2f}%)")
+        results.append(f"⏱️ Training time: {train_seconds:.2f}s")
         
         # Classification Report
         results.append(f"\n📊 Classification Report:")
@@ -114,25 +120,49 @@ def train_and_evaluate_all_models():
         cm = confusion_matrix(y_test, y_pred)
         results.append(str(cm))
         
-        print(f"✅ {model_name} - Accuracy: {accuracy:.4f}")
+        print(f"✅ {model_name} - Accuracy: {accuracy:.4f} ({train_seconds:.2f}s)")
         
         # Track best model
         if accuracy > best_accuracy:
             best_accuracy = accuracy
-            best_model = pipeline
+            best_model = estimator
             best_model_name = model_name
     
-    # 6. Save Best Model
+    # Serve the winner as a single pipeline with the shared, already fitted vectorizer
+    best_model = Pipeline([('tfidf', vectorizer), ('clf', best_model)])
+    
+    # 7. Save Best Model
     results.append(f"\n{'=' * 80}")
     results.append(f"BEST MODEL: {best_model_name}")
     results.append(f"BEST ACCURACY: {best_accuracy:.4f} ({best_accuracy*100:.2f}%)")
+    results.append(f"TOTAL TRAINING TIME: {total_seconds:.2f}s on {workers} worker(s)")
     results.append(f"{'=' * 80}")
     
     model_path = os.path.join(BASE_DIR, "custom_model.joblib")
     joblib.dump(best_model, model_path)
     results.append(f"\n💾 Best model saved to: {model_path}")
+
+    # Compile the NumPy-only scorer (linear models only) and check it against the pipeline
+    sample_texts = preprocess_texts(pd.read_csv(DATA_PATH, nrows=PARITY_SAMPLES)['Article'])
+    scorer_path, parity = export_scorer(best_model, model_path, sample_texts)
+    if scorer_path:
+        results.append(f"⚡ Compiled scorer saved to: {scorer_path} (max probability difference {parity:.2e})")
+    else:
+        results.append(f"⚠️ Compiled scorer not exported: {parity}")
+
+    # Publish to the model registry (running APIs pick it up without a restart)
+    version = publish_model(best_model, {
+        "model_name": best_model_name,
+        "accuracy": best_accuracy,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "data_path": DATA_PATH,
+        "data_hash": data_hash(DATA_PATH),
+        "train_samples": len(y_train),
+        "test_samples": len(y_test),
+    }, extra_files=[scorer_path] if scorer_path else [])
+    results.append(f"📦 Published model version: {version}")
     
-    # 7. Save Results to File
+    # 8. Save Results to File
     with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
         f.write('\n'.join(results))
     
@@ -144,11 +174,16 @@ def train_and_evaluate_all_models():
     print("\n" + "=" * 80)
     print("SUMMARY")
     print("=" * 80)
-    for model_name, pipeline in models.items():
-        y_pred = pipeline.predict(X_test)
-        acc = accuracy_score(y_test, y_pred)
-        print(f"{model_name:20s}: {acc*100:.2f}%")
+    for model_name, accuracy, train_seconds in summary:
+        print(f"{model_name:20s}: {accuracy*100:.2f}% ({train_seconds:.2f}s)")
+    print(f"{'Wall clock':20s}: {total_seconds:.2f}s on {workers} worker(s)")
     print("=" * 80)
 
 if __name__ == "__main__":
-    train_and_evaluate_all_models()
+    parser = argparse.ArgumentParser(description="Train and compare candidate models on shared TF-IDF features")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Models trained in parallel (default: CPU count, at most one per model)")
+    parser.add_argument("--no-feature-cache", action="store_true",
+                        help="Preprocess and vectorize from scratch without reading or writing the feature store")
+    args = parser.parse_args()
+    train_and_evaluate_all_models(args.workers, use_feature_cache=not args.no_feature_cache)
@@ -1,14 +1,17 @@
 import pandas as pd
 import numpy as np
-import re
-import string
+import argparse
 import joblib
-from sklearn.model_selection import train_test_split
+from feature_store import load_features
+from linear_scorer import export_scorer
+from model_registry import data_hash, publish_model
+from text_preprocessing import preprocess_texts
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, classification_report
 import os
+from datetime import datetime
 
 # Define paths
 # Get the directory where this script is located
@@ -17,19 +20,12 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(BASE_DIR, "..", "..", "flipitnews-data.csv")
 MODEL_PATH = os.path.join(BASE_DIR, "custom_model.joblib")
 
-def preprocess_text(text):
-    """
-    Basic text cleaning: lowercase, remove special chars
-    """
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'[%s]' % re.escape(string.punctuation), '', text)
-    text = re.sub(r'\w*\d\w*', '', text)
-    return text
+# TF-IDF configuration; part of the feature store key
+VECTORIZER_PARAMS = {"max_features": 5000, "stop_words": "english"}
+# Articles the compiled scorer is checked against after training
+PARITY_SAMPLES = 500
 
-def train():
+def train(use_feature_cache=True):
     print("🚀 Starting model training...")
     
     # 1. Load Data
@@ -37,33 +33,29 @@ def train():
         print(f"❌ Error: Data file not found at {DATA_PATH}")
         return
 
-    print(f"📊 Loading data from {DATA_PATH}...")
-    df = pd.read_csv(DATA_PATH)
-    
-    # 2. Preprocess
-    print("🧹 Preprocessing text...")
-    df['cleaned_text'] = df['Article'].apply(preprocess_text)
-    
-    X = df['cleaned_text']
-    y = df['Category']
-    
-    # 3. Split Data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # 2-3. Preprocess, split and vectorize (loaded from the feature store
+    # when the data, preprocessing and TF-IDF settings are unchanged)
+    print(f"📊 Loading features for {DATA_PATH}...")
+    features = load_features(DATA_PATH, TfidfVectorizer, VECTORIZER_PARAMS,
+                             test_size=0.2, random_state=42, use_cache=use_feature_cache)
+    print("⚡ Loaded cached features" if features.cache_hit else "🧹 Preprocessed and vectorized text")
+    X_train, X_test, y_train, y_test = features.X_train, features.X_test, features.y_train, features.y_test
     
     # 4. Build Pipeline (TF-IDF + Logistic Regression)
     # Using the configuration that gave high accuracy in your analysis
-    pipeline = Pipeline([
-        ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
-        ('clf', LogisticRegression(n_jobs=-1, max_iter=1000))
-    ])
+    clf = LogisticRegression(n_jobs=-1, max_iter=1000)
     
     # 5. Train
     print("🧠 Training Logistic Regression model...")
-    pipeline.fit(X_train, y_train)
+    clf.fit(X_train, y_train)
+    pipeline = Pipeline([
+        ('tfidf', features.vectorizer),
+        ('clf', clf)
+    ])
     
     # 6. Evaluate
     print("📉 Evaluating model...")
-    y_pred = pipeline.predict(X_test)
+    y_pred = clf.predict(X_test)
     accuracy = accuracy_score(y_test, y_pred)
     
     print(f"\n✅ Training Complete!")
@@ -74,7 +66,31 @@ def train():
     # 7. Save Model
     print(f"💾 Saving model to {MODEL_PATH}...")
     joblib.dump(pipeline, MODEL_PATH)
+
+    # 8. Compile the NumPy-only scorer and check it against the pipeline
+    sample_texts = preprocess_texts(pd.read_csv(DATA_PATH, nrows=PARITY_SAMPLES)['Article'])
+    scorer_path, parity = export_scorer(pipeline, MODEL_PATH, sample_texts)
+    if scorer_path:
+        print(f"⚡ Compiled scorer saved to {scorer_path} (max probability difference {parity:.2e})")
+    else:
+        print(f"⚠️ Compiled scorer not exported: {parity}")
+
+    # 9. Publish to the model registry (running APIs pick it up without a restart)
+    version = publish_model(pipeline, {
+        "model_name": "Logistic Regression",
+        "accuracy": accuracy,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "data_path": DATA_PATH,
+        "data_hash": data_hash(DATA_PATH),
+        "train_samples": X_train.shape[0],
+        "test_samples": X_test.shape[0],
+    }, extra_files=[scorer_path] if scorer_path else [])
+    print(f"📦 Published model version {version}")
     print("✨ Done!")
 
 if __name__ == "__main__":
-    train()
+    parser = argparse.ArgumentParser(description="Train the custom TF-IDF + Logistic Regression model")
+    parser.add_argument("--no-feature-cache", action="store_true",
+                        help="Preprocess and vectorize from scratch without reading or writing the feature store")
+    args = parser.parse_args()
+    train(use_feature_cache=not args.no_feature_cache)
@@ -0,0 +1,159 @@
+import pandas as pd
+import numpy as np
+import argparse
+import joblib
+try:
+    import resource
+except ImportError:
+    # Not available on Windows: peak memory isn't reported there
+    resource = None
+import time
+from model_registry import data_hash, publish_model
+from linear_scorer import remove_scorer
+from text_preprocessing import preprocess_texts
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+import os
+from datetime import datetime
+
+# Out-of-core variant of train_custom_model.py for archives that don't fit
+# in memory: the CSV is read in chunks, features come from a stateless
+# HashingVectorizer (no vocabulary to hold) and the classifier learns with
+# partial_fit, so memory stays flat however large the corpus grows.
+
+# Define paths
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "flipitnews-data.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "custom_model.joblib")
+
+def make_vectorizer(n_features: int) -> HashingVectorizer:
+    # alternate_sign=False keeps features non-negative (required by MultinomialNB)
+    return HashingVectorizer(n_features=n_features, stop_words='english', alternate_sign=False, norm='l2')
+
+def make_classifier(name: str):
+    if name == "nb":
+        return MultinomialNB(alpha=0.01)
+    # log_loss gives predict_proba, which the API uses for confidences
+    return SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+
+def stream_chunks(data_path: str, chunk_size: int, test_size: float, seed: int):
+    """
+    Yield (cleaned_texts, labels, is_test) per chunk. The held-out mask is
+    drawn from a generator seeded with the chunk number, so every pass over
+    the file puts the same rows in the held-out stream.
+    """
+    reader = pd.read_csv(data_path, chunksize=chunk_size, usecols=['Article', 'Category'])
+    for chunk_index, chunk in enumerate(reader):
+        chunk = chunk.dropna(subset=['Category'])
+        is_test = np.random.default_rng([seed, chunk_index]).random(len(chunk)) < test_size
+        yield preprocess_texts(chunk['Article'].tolist()), chunk['Category'].to_numpy(dtype=str), is_test
+
+def scan_classes(data_path: str, chunk_size: int) -> list:
+    """All categories in the file (partial_fit needs them up front)"""
+    classes = set()
+    for chunk in pd.read_csv(data_path, chunksize=chunk_size, usecols=['Category']):
+        classes.update(chunk['Category'].dropna().astype(str))
+    return sorted(classes)
+
+def train_streaming(data_path, chunk_size, epochs, test_size, n_features, estimator, seed):
+    print("🚀 Starting streaming model training...")
+
+    # 1. Check Data
+    if not os.path.exists(data_path):
+        print(f"❌ Error: Data file not found at {data_path}")
+        return
+
+    print(f"📊 Scanning categories in {data_path}...")
+    classes = scan_classes(data_path, chunk_size)
+    print(f"   {len(classes)} categories: {classes}")
+
+    vectorizer = make_vectorizer(n_features)
+    clf = make_classifier(estimator)
+
+    # 2. Train, one chunk at a time
+    start = time.perf_counter()
+    train_samples = 0
+    for epoch in range(epochs):
+        print(f"🧠 Epoch {epoch + 1}/{epochs} ({type(clf).__name__}, {n_features} hashed features)...")
+        for chunk_index, (texts, labels, is_test) in enumerate(stream_chunks(data_path, chunk_size, test_size, seed)):
+            train_rows = np.flatnonzero(~is_test)
+            if len(train_rows) == 0:
+                continue
+            # Shuffle within the chunk so SGD doesn't see long runs of one category
+            train_rows = np.random.default_rng([seed, epoch, chunk_index]).permutation(train_rows)
+            X = vectorizer.transform([texts[i] for i in train_rows])
+            clf.partial_fit(X, labels[train_rows], classes=classes)
+            if epoch == 0:
+                train_samples += len(train_rows)
+        print(f"   ✅ {train_samples} training rows ({time.perf_counter() - start:.1f}s)")
+    train_seconds = time.perf_counter() - start
+
+    pipeline = Pipeline([
+        ('hashing', vectorizer),
+        ('clf', clf)
+    ])
+
+    # 3. Evaluate on the held-out stream (confusion counts only, no stored predictions)
+    print("📉 Evaluating on the held-out stream...")
+    index = {label: i for i, label in enumerate(clf.classes_)}
+    confusion = np.zeros((len(index), len(index)), dtype=np.int64)
+    for texts, labels, is_test in stream_chunks(data_path, chunk_size, test_size, seed):
+        test_rows = np.flatnonzero(is_test)
+        if len(test_rows) == 0:
+            continue
+        predictions = clf.predict(vectorizer.transform([texts[i] for i in test_rows]))
+        for true, predicted in zip(labels[test_rows], predictions):
+            confusion[index[true], index[predicted]] += 1
+
+    test_samples = int(confusion.sum())
+    accuracy = np.trace(confusion) / test_samples if test_samples else 0.0
+
+    print(f"\n✅ Training Complete!")
+    print(f"🏆 Held-out Accuracy: {accuracy:.2%} ({test_samples} rows)")
+    print(f"⏱️ Training time: {train_seconds:.1f}s")
+    if resource is not None:
+        # ru_maxrss is reported in kilobytes on Linux
+        print(f"💾 Peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    print("\nPer-category recall / precision:")
+    for label, i in index.items():
+        recall = confusion[i, i] / confusion[i].sum() if confusion[i].sum() else 0.0
+        precision = confusion[i, i] / confusion[:, i].sum() if confusion[:, i].sum() else 0.0
+        print(f"   {label:15s} recall {recall:.2%} | precision {precision:.2%}")
+
+    # 4. Save Model (same Pipeline interface as the TF-IDF model: main.py serves it unchanged)
+    print(f"💾 Saving model to {MODEL_PATH}...")
+    joblib.dump(pipeline, MODEL_PATH)
+    # Hashed features have no vocabulary to compile: drop any scorer an
+    # earlier TF-IDF model left next to the file
+    remove_scorer(MODEL_PATH)
+
+    # 5. Publish to the model registry (running APIs pick it up without a restart)
+    version = publish_model(pipeline, {
+        "model_name": f"Streaming {type(clf).__name__} (hashed features)",
+        "accuracy": accuracy,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "data_path": data_path,
+        "data_hash": data_hash(data_path),
+        "train_samples": train_samples,
+        "test_samples": test_samples,
+        "epochs": epochs,
+        "n_features": n_features,
+    })
+    print(f"📦 Published model version {version}")
+    print("✨ Done!")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the custom model out-of-core with hashed features and partial_fit")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV with Article and Category columns")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows held in memory at a time")
+    parser.add_argument("--epochs", type=int, default=3, help="Passes over the training stream")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Fraction of rows held out for evaluation")
+    parser.add_argument("--n-features", type=int, default=2 ** 18, help="Hashed feature space size")
+    parser.add_argument("--estimator", default="sgd", choices=["sgd", "nb"],
+                        help="sgd: logistic regression via SGD; nb: multinomial naive Bayes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    train_streaming(args.data, args.chunk_size, args.epochs, args.test_size,
+                    args.n_features, args.estimator, args.seed)
@@ -0,0 +1,58 @@
+"""
+Selectable inference engines for the zero-shot classifier.
+
+    pytorch    full-precision PyTorch pipeline (default)
+    quantized  PyTorch with int8 dynamic quantization of the Linear layers
+    onnx       ONNX Runtime export created by export_model.py
+    onnx-int8  int8-quantized ONNX Runtime export created by export_model.py --quantize
+
+All engines return a regular transformers zero-shot-classification
+pipeline, so callers don't need to know which one is active.
+"""
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ONNX_ROOT = os.getenv("ZERO_SHOT_ONNX_ROOT", os.path.join(BASE_DIR, "onnx_models"))
+ENGINES = ("pytorch", "quantized", "onnx", "onnx-int8")
+
+def onnx_model_dir(model_name: str, quantized: bool = False) -> str:
+    """Directory where export_model.py writes the ONNX export of `model_name`"""
+    folder = model_name.replace("/", "__") + ("-int8" if quantized else "")
+    return os.path.join(ONNX_ROOT, folder)
+
+def load_zero_shot_classifier(model_name: str, engine: str = "pytorch"):
+    """Build a zero-shot-classification pipeline running on `engine`"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown zero-shot engine '{engine}'. Choose one of: {', '.join(ENGINES)}")
+
+    from transformers import pipeline
+
+    if engine == "pytorch":
+        return pipeline("zero-shot-classification", model=model_name)
+
+    if engine == "quantized":
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError as e:
+        raise ImportError(
+            "The ONNX engines need optimum[onnxruntime]. Install it with "
+            "'pip install optimum[onnxruntime]'"
+        ) from e
+    from transformers import AutoTokenizer
+
+    model_dir = onnx_model_dir(model_name, quantized=engine == "onnx-int8")
+    if not os.path.isdir(model_dir):
+        raise FileNotFoundError(
+            f"ONNX export not found at {model_dir}. Run export_model.py first."
+        )
+    model = ORTModelForSequenceClassification.from_pretrained(model_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)